@@ -5,3 +5,6 @@ class AdminpanelConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'adminpanel'
     verbose_name = "Admin Management Panel"
+
+    def ready(self):
+        import adminpanel.signals
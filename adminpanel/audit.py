@@ -0,0 +1,147 @@
+"""
+Audit trail of admin and account actions, written off the request path.
+
+record() only puts the event on an in-process queue holding at most
+AUDIT_QUEUE_SIZE events. A writer thread saves whatever has queued up
+with one bulk_create, after AUDIT_FLUSH_INTERVAL seconds or as soon as
+AUDIT_BATCH_SIZE events are waiting. When the queue is full, because the
+database is slow or down, the request saves its own event instead, so
+memory stays bounded and nothing is dropped. Queued events are written
+when the process exits.
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from core import metrics
+
+from .models import AuditEvent
+
+logger = logging.getLogger(__name__)
+
+
+class AuditLog:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = None
+        self._queue = None
+        self._thread = None
+
+    def _writer_queue(self):
+        """
+        Returns this process's queue, starting the writer thread on first
+        use and again in a forked worker, which does not inherit threads.
+        """
+        with self._lock:
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._queue = queue.Queue(maxsize=settings.AUDIT_QUEUE_SIZE)
+                self._thread = None
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+                self._thread.start()
+            return self._queue
+
+    def record(self, request, action, target="", **details):
+        """
+        Queues one event for the user making request. Details that are not
+        JSON serializable raise TypeError here, not in the writer.
+        """
+        json.dumps(details, cls=AuditEvent._meta.get_field("details").encoder)
+        user = getattr(request, "user", None)
+        event = AuditEvent(
+            created_at=timezone.now(),
+            action=action,
+            actor=user.get_username() if user is not None and user.is_authenticated else "",
+            target=target,
+            ip=request.META.get("REMOTE_ADDR") or None,
+            details=details,
+        )
+        try:
+            self._writer_queue().put_nowait(event)
+        except queue.Full:
+            metrics.inc("smartcalc_audit_events_total", {"result": "overflow"})
+            self._write([event])
+
+    def flush(self, timeout=5.0):
+        """
+        Waits up to timeout seconds for every event queued so far to be written.
+        """
+        with self._lock:
+            if self._pid != os.getpid() or self._queue is None:
+                return
+            events_queue, writer = self._queue, self._thread
+
+        if writer is not None and writer.is_alive():
+            done = threading.Event()
+            try:
+                events_queue.put(done, timeout=timeout)
+            except queue.Full:
+                return
+            done.wait(timeout)
+            return
+
+        # No writer (it cannot be started while the interpreter exits)
+        events = []
+        while True:
+            try:
+                item = events_queue.get_nowait()
+            except queue.Empty:
+                break
+            if not isinstance(item, threading.Event):
+                events.append(item)
+        if events:
+            self._write(events)
+
+    def _run(self):
+        events_queue = self._queue
+        while True:
+            item = events_queue.get()
+            batch, flushes = [], []
+            deadline = time.monotonic() + settings.AUDIT_FLUSH_INTERVAL
+            while True:
+                if isinstance(item, threading.Event):
+                    flushes.append(item)
+                    break
+                batch.append(item)
+                remaining = deadline - time.monotonic()
+                if len(batch) >= settings.AUDIT_BATCH_SIZE or remaining <= 0:
+                    break
+                try:
+                    item = events_queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+
+            if batch:
+                close_old_connections()
+                self._write(batch)
+            for done in flushes:
+                done.set()
+
+    def _write(self, events):
+        try:
+            AuditEvent.objects.bulk_create(events)
+        except Exception:
+            # Not only DatabaseError: any exception would end the writer
+            # thread and lose its batch unlogged
+            metrics.inc("smartcalc_audit_events_total", {"result": "failed"}, len(events))
+            logger.exception(
+                "Could not write %d audit events: %s", len(events),
+                [(e.created_at.isoformat(), e.action, e.actor, e.target) for e in events],
+            )
+        else:
+            metrics.inc("smartcalc_audit_events_total", {"result": "written"}, len(events))
+
+
+audit = AuditLog()
+record = audit.record
+atexit.register(audit.flush)
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2026-10-18 09:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuditEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(db_index=True)),
+                ('action', models.CharField(choices=[('user.create', 'User created'), ('admin.create', 'Admin created'), ('user.delete', 'User deleted'), ('password.change', 'Password changed')], db_index=True, max_length=32)),
+                ('actor', models.CharField(blank=True, db_index=True, max_length=150)),
+                ('target', models.CharField(blank=True, db_index=True, max_length=150)),
+                ('ip', models.GenericIPAddressField(blank=True, null=True)),
+                ('details', models.JSONField(blank=True, default=dict)),
+            ],
+            options={
+                'ordering': ['-id'],
+            },
+        ),
+    ]
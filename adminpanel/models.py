@@ -1,3 +1,35 @@
 from django.db import models
 
-# Create your models here.
+
+class AuditEvent(models.Model):
+    """
+    One admin or account action, written in batches by adminpanel.audit.
+
+    Usernames are copied rather than only linked so that events outlive
+    the users they mention. Lookups filter on one indexed column and order
+    by id, which both SQLite and InnoDB keep at the end of every secondary
+    index, so a page of results never needs a sort.
+    """
+    USER_CREATED = "user.create"
+    ADMIN_CREATED = "admin.create"
+    USER_DELETED = "user.delete"
+    PASSWORD_CHANGED = "password.change"
+    ACTIONS = [
+        (USER_CREATED, "User created"),
+        (ADMIN_CREATED, "Admin created"),
+        (USER_DELETED, "User deleted"),
+        (PASSWORD_CHANGED, "Password changed"),
+    ]
+
+    created_at = models.DateTimeField(db_index=True)
+    action = models.CharField(max_length=32, choices=ACTIONS, db_index=True)
+    actor = models.CharField(max_length=150, blank=True, db_index=True)
+    target = models.CharField(max_length=150, blank=True, db_index=True)
+    ip = models.GenericIPAddressField(null=True, blank=True)
+    details = models.JSONField(default=dict, blank=True)
+
+    class Meta:
+        ordering = ['-id']
+
+    def __str__(self):
+        return f"{self.created_at:%Y-%m-%d %H:%M:%S} {self.actor} {self.action} {self.target}"
@@ -0,0 +1,195 @@
+"""
+User search for the admin panel user list.
+
+Users come newest first, ordered by (date_joined, id) and paged by the
+last row seen instead of an offset, so a page reads the date_joined
+index (users/0004) in order however deep it is:
+  - a role pins is_superuser and is_staff, so a page reads
+    auth_user_role_joined_idx in order; a date range is a range on the
+    same column the list is ordered by;
+  - prefix search matches LOWER(username) and LOWER(email) against the
+    lowercased prefix in a way both indexes can answer (_starts_with());
+  - word search looks up whole words in the full-text index: MATCH ...
+    AGAINST in boolean mode on MySQL, the auth_user_fts FTS5 table on
+    SQLite, and substring filters on other databases.
+A search index returns matches in its own order, which the list then has
+to sort; _narrow() keeps that cheap.
+Boolean filters use __in because SQLite cannot use an index for the bare
+"WHERE is_staff" that Django renders for is_staff=True.
+"""
+
+import re
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connections
+from django.db.models import F, FloatField, Q
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Lower
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+PREFIX = "prefix"
+WORDS = "words"
+MATCHES = [(PREFIX, "Starts with"), (WORDS, "Contains words")]
+
+ROLES = {
+    "superadmin": {"is_superuser__in": [True]},
+    "admin": {"is_superuser__in": [False], "is_staff__in": [True]},
+    "regular": {"is_superuser__in": [False], "is_staff__in": [False]},
+}
+ROLE_CHOICES = [("superadmin", "Super admins"), ("admin", "Admins"), ("regular", "Regular users")]
+
+
+def prefix_bounds(prefix):
+    """
+    The range of strings starting with prefix, prefix <= s < upper, when
+    strings compare by code point.
+    """
+    return prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def search_words(text):
+    return re.findall(r"\w+", text.lower())
+
+
+def _narrow(users, matches, broad):
+    """
+    Filters users down to matches, ids found through a search index, when
+    there are fewer than ADMIN_USER_SEARCH_SORT_LIMIT of them; those are
+    cheap to sort. More matches than that are common enough that walking
+    the date_joined index finds a page within a few hundred rows, so users
+    are filtered with broad(users) instead, a condition the database
+    checks row by row rather than through the search index.
+    """
+    limit = settings.ADMIN_USER_SEARCH_SORT_LIMIT
+    ids = list(matches[:limit])
+    if len(ids) < limit:
+        return users.filter(id__in=ids)
+    return broad(users)
+
+
+def _starts_with(vendor, name, prefix):
+    """
+    A condition for the LOWER() alias name starting with prefix.
+
+    SQLite compares strings by code point, so a range is exact, and it is
+    what its expression indexes answer (LIKE only uses NOCASE indexes).
+    Elsewhere strings compare by collation, under which the next string
+    after the prefix can sort anywhere: "z" becomes "{", which MySQL's
+    utf8mb4_0900_ai_ci puts before every letter. There LOWER(...) LIKE
+    'prefix%' uses the index instead.
+    """
+    if vendor == "sqlite":
+        lower, upper = prefix_bounds(prefix)
+        return Q(**{f"{name}__gte": lower, f"{name}__lt": upper})
+    return Q(**{f"{name}__startswith": prefix})
+
+
+def _prefix(users, q):
+    vendor, prefix = connections[users.db].vendor, q.lower()
+    matches = User.objects.alias(
+        username_lower=Lower("username"), email_lower=Lower("email"),
+    ).filter(
+        _starts_with(vendor, "username_lower", prefix)
+        | _starts_with(vendor, "email_lower", prefix)
+    ).values_list("id", flat=True)
+    # LIKE ignores case without LOWER(), so it cannot use those indexes
+    return _narrow(users, matches, lambda users: users.filter(
+        Q(username__istartswith=q) | Q(email__istartswith=q)
+    ))
+
+
+def _full_text_ids(vendor, words):
+    if vendor == "sqlite":
+        query = " ".join(f'"{word}"' for word in words)
+        return User.objects.filter(id__in=RawSQL(
+            "SELECT rowid FROM auth_user_fts WHERE auth_user_fts MATCH %s", [query],
+        )).values_list("id", flat=True)
+    if vendor == "mysql":
+        # Words shorter than innodb_ft_min_token_size (3) are not indexed
+        query = " ".join(f"+{word}" for word in words)
+        return User.objects.alias(relevance=RawSQL(
+            "MATCH (auth_user.username, auth_user.email) AGAINST (%s IN BOOLEAN MODE)",
+            [query], output_field=FloatField(),
+        )).filter(relevance__gt=0).values_list("id", flat=True)
+    return None
+
+
+def _full_text(users, words):
+    matches = _full_text_ids(connections[users.db].vendor, words)
+    if matches is None:
+        for word in words:
+            users = users.filter(Q(username__icontains=word) | Q(email__icontains=word))
+        return users
+    # id + 0 keeps the database off the primary key and on date_joined
+    return _narrow(users, matches, lambda users: users.alias(
+        id_plus_zero=F("id") + 0,
+    ).filter(id_plus_zero__in=matches))
+
+
+def _day_start(value):
+    try:
+        day = parse_date(value or "")
+    except ValueError:
+        return None
+    if day is None:
+        return None
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def find_users(q="", match=PREFIX, role="", joined_from="", joined_to=""):
+    """
+    Users matching the admin panel filters, newest first. Unknown or
+    malformed values leave their filter out.
+    """
+    users = User.objects.order_by("-date_joined", "-id")
+
+    q = q.strip()
+    if match == WORDS:
+        words = search_words(q)
+        if words:
+            users = _full_text(users, words)
+    elif q:
+        users = _prefix(users, q)
+
+    if role in ROLES:
+        users = users.filter(**ROLES[role])
+
+    start = _day_start(joined_from)
+    if start is not None:
+        users = users.filter(date_joined__gte=start)
+    end = _day_start(joined_to)
+    if end is not None:
+        # The "to" day is included
+        users = users.filter(date_joined__lt=end + timedelta(days=1))
+    return users
+
+
+def cursor_for(user):
+    return f"{user.date_joined.isoformat()}_{user.pk}"
+
+
+def page_before(users, cursor, size):
+    """
+    Returns up to size users after the one cursor_for() described (all
+    from the start for an empty or malformed cursor) and the cursor of the
+    next page, or None on the last page.
+    """
+    joined, _, pk = (cursor or "").rpartition("_")
+    try:
+        joined, pk = datetime.fromisoformat(joined), int(pk)
+    except ValueError:
+        pass
+    else:
+        # The bare date_joined bound lets the database seek straight to it
+        users = users.filter(
+            Q(date_joined__lt=joined) | Q(date_joined=joined, id__lt=pk),
+            date_joined__lte=joined,
+        )
+
+    page = list(users[:size + 1])
+    if len(page) > size:
+        return page[:size], cursor_for(page[size - 1])
+    return page, None
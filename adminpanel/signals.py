@@ -0,0 +1,19 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from users.signals import users_bulk_created
+from .stats import bump_users_version
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_stats(sender, instance, **kwargs):
+    # Logins only touch last_login, which no cached statistic or fragment shows
+    if kwargs.get("update_fields") == {"last_login"}:
+        return
+    transaction.on_commit(bump_users_version)
+
+
+@receiver(users_bulk_created)
+def invalidate_user_stats_after_bulk(sender, users, **kwargs):
+    transaction.on_commit(bump_users_version)
@@ -0,0 +1,87 @@
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils import timezone
+
+USERS_VERSION_KEY = "adminpanel:users:version"
+USER_STATS_KEY = "adminpanel:user_stats:{version}:{month}"
+
+
+def get_users_version():
+    """
+    Returns the current version of the user table, bumped by User signals.
+    """
+    version = cache.get(USERS_VERSION_KEY)
+    if version is None:
+        cache.add(USERS_VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(USERS_VERSION_KEY)
+    return version
+
+
+def bump_users_version():
+    cache.set(USERS_VERSION_KEY, uuid.uuid4().hex, None)
+
+
+def users_fragment_version(now=None):
+    """
+    Returns the cache key part for template fragments showing user data.
+
+    It changes on every User save/delete and, because the statistics
+    include this month's growth, when the month turns.
+    """
+    return "%s:%s" % (get_users_version(), (now or timezone.now()).strftime("%Y-%m"))
+
+
+def month_bounds(now):
+    first_day_this_month = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    first_day_last_month = (first_day_this_month - timedelta(days=1)).replace(day=1)
+    return first_day_this_month, first_day_last_month
+
+
+def compute_user_stats(now=None):
+    """
+    Counts every dashboard and user list statistic in a single query.
+    """
+    first_day_this_month, first_day_last_month = month_bounds(now or timezone.now())
+
+    return User.objects.aggregate(
+        total=Count("id"),
+        staff=Count("id", filter=Q(is_staff=True)),
+        admins=Count("id", filter=Q(is_staff=True, is_superuser=False)),
+        superadmins=Count("id", filter=Q(is_superuser=True)),
+        regular=Count("id", filter=Q(is_staff=False, is_superuser=False)),
+        this_month=Count("id", filter=Q(date_joined__gte=first_day_this_month)),
+        last_month=Count("id", filter=Q(
+            date_joined__gte=first_day_last_month,
+            date_joined__lt=first_day_this_month,
+        )),
+    )
+
+
+def get_user_stats():
+    """
+    Returns the user statistics, cached until the next User save/delete.
+
+    ADMIN_STATS_CACHE_TIMEOUT = 0 disables the cache and always queries.
+    """
+    timeout = getattr(settings, "ADMIN_STATS_CACHE_TIMEOUT", 300)
+    now = timezone.now()
+    if not timeout:
+        return compute_user_stats(now)
+
+    key = USER_STATS_KEY.format(version=get_users_version(), month=now.strftime("%Y-%m"))
+    stats = cache.get(key)
+    if stats is None:
+        stats = compute_user_stats(now)
+        cache.set(key, stats, timeout)
+    return stats
+
+
+def monthly_growth(stats):
+    if stats["last_month"] == 0:
+        return 100 if stats["this_month"] > 0 else 0
+    return round(((stats["this_month"] - stats["last_month"]) / stats["last_month"]) * 100, 2)
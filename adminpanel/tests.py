@@ -1,3 +1,142 @@
-from django.test import TestCase
+from datetime import timedelta
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.http import QueryDict
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from . import audit
+from .models import AuditEvent
+from .search import WORDS, find_users, page_before
+
+START = timezone.now().replace(microsecond=0) - timedelta(days=30)
+
+
+def usernames(users):
+    return [user.username for user in users]
+
+
+class FindUsersTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        people = [
+            # username, email, is_superuser, is_staff, days after START
+            ("alice", "alice@corp.io", True, True, 0),
+            ("bob", "bob.builder@school.edu", False, True, 1),
+            ("carol", "carol.white@school.edu", False, False, 2),
+            ("zoe", "zoe@example.com", False, False, 3),
+            ("zed9", "9lives@example.com", False, False, 4),
+        ]
+        User.objects.bulk_create(
+            User(
+                username=username, email=email, password="!",
+                is_superuser=is_superuser, is_staff=is_staff,
+                date_joined=START + timedelta(days=days),
+            )
+            for username, email, is_superuser, is_staff, days in people
+        )
+
+    def test_prefix_matches_username_or_email_ignoring_case(self):
+        # With a small sort limit the broad, row-by-row filter is used instead
+        for limit in (2000, 1):
+            with self.subTest(limit=limit), override_settings(ADMIN_USER_SEARCH_SORT_LIMIT=limit):
+                self.assertEqual(usernames(find_users("AL")), ["alice"])
+                self.assertEqual(usernames(find_users("carol.w")), ["carol"])
+                self.assertEqual(usernames(find_users("z")), ["zed9", "zoe"])
+                self.assertEqual(usernames(find_users("9")), ["zed9"])
+                self.assertEqual(usernames(find_users("white")), [])
+
+    def test_prefix_treats_like_wildcards_literally(self):
+        self.assertEqual(usernames(find_users("%")), [])
+        self.assertEqual(usernames(find_users("_ob")), [])
+
+    def test_words_match_whole_words_anywhere(self):
+        for limit in (2000, 1):
+            with self.subTest(limit=limit), override_settings(ADMIN_USER_SEARCH_SORT_LIMIT=limit):
+                self.assertEqual(usernames(find_users("school", WORDS)), ["carol", "bob"])
+                self.assertEqual(usernames(find_users("School White", WORDS)), ["carol"])
+                self.assertEqual(usernames(find_users("whit", WORDS)), [])
+
+    def test_roles(self):
+        self.assertEqual(usernames(find_users(role="superadmin")), ["alice"])
+        self.assertEqual(usernames(find_users(role="admin")), ["bob"])
+        self.assertEqual(usernames(find_users(role="regular")), ["zed9", "zoe", "carol"])
+        self.assertEqual(len(find_users(role="unknown")), 5)
+
+    def test_date_range_includes_both_days(self):
+        users = find_users(
+            joined_from=(START + timedelta(days=1)).date().isoformat(),
+            joined_to=(START + timedelta(days=3)).date().isoformat(),
+        )
+        self.assertEqual(usernames(users), ["zoe", "carol", "bob"])
+        self.assertEqual(len(find_users(joined_from="not a date")), 5)
+
+    def test_rename_updates_the_full_text_index(self):
+        carol = User.objects.get(username="carol")
+        carol.username = "caroline"
+        carol.email = "caroline@corp.io"
+        carol.save()
+
+        self.assertEqual(usernames(find_users("caroline", WORDS)), ["caroline"])
+        self.assertEqual(usernames(find_users("school", WORDS)), ["bob"])
+
+
+class PageBeforeTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # Three users to a date_joined, so pages split ties
+        User.objects.bulk_create(
+            User(username=f"user{i:02d}", password="!", date_joined=START + timedelta(hours=i // 3))
+            for i in range(25)
+        )
+
+    def test_walks_every_user_once_through_the_query_string(self):
+        users = find_users()
+        seen, query = [], QueryDict(mutable=True)
+        while True:
+            # As the "older" link does it
+            before = QueryDict(query.urlencode()).get("before", "")
+            page, cursor = page_before(users, before, 10)
+            seen += usernames(page)
+            if cursor is None:
+                break
+            query["before"] = cursor
+
+        self.assertEqual(seen, usernames(users))
+        self.assertEqual(len(set(seen)), 25)
+
+    def test_malformed_cursor_starts_from_the_newest(self):
+        page, cursor = page_before(find_users(), "yesterday_x", 10)
+        self.assertEqual(page[0].username, "user24")
+        self.assertIsNotNone(cursor)
+
+
+class AuditLogTests(TransactionTestCase):
+    """
+    The writer thread has its own connection, so these tests commit.
+    """
+
+    def setUp(self):
+        # Events other tests queued
+        audit.audit.flush()
+        AuditEvent.objects.all().delete()
+
+    def test_recorded_event_is_stored_by_flush(self):
+        request = RequestFactory().post("/", REMOTE_ADDR="10.1.2.3")
+        audit.record(request, AuditEvent.USER_DELETED, target="bob", reason="left")
+        audit.audit.flush()
+
+        event = AuditEvent.objects.get()
+        self.assertEqual(
+            (event.action, event.actor, event.target, event.ip, event.details),
+            (AuditEvent.USER_DELETED, "", "bob", "10.1.2.3", {"reason": "left"}),
+        )
+
+    def test_details_that_are_not_json_are_refused_by_record(self):
+        request = RequestFactory().post("/")
+        with self.assertRaises(TypeError):
+            audit.record(request, AuditEvent.USER_DELETED, target="bob", when=object())
+
+        audit.record(request, AuditEvent.USER_DELETED, target="carol")
+        audit.audit.flush()
+        self.assertEqual(list(AuditEvent.objects.values_list("target", flat=True)), ["carol"])
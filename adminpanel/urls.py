@@ -11,4 +11,5 @@ urlpatterns = [
     path('users/add/', views.add_user, name='add_user'),
     path('add-admin/', views.add_admin, name='add_admin'),
     path('users/delete/<int:user_id>/', views.delete_user, name='delete_user'),
+    path('audit/', views.audit_log, name='audit_log'),
 ]
@@ -1,16 +1,19 @@
-import os
+import json
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.auth.models import User
-from django.core.paginator import Paginator
 from django.contrib import messages
 from django.views.decorators.csrf import csrf_protect
 from django.conf import settings
-from django.utils import timezone
-from django.db.models.functions import TruncMonth
-from django.db.models import Count
-from datetime import timedelta
+from core.logtail import tail_lines
+from users.hashing import HashingBusy
+from users.provisioning import ProvisioningError, provision_user
+from users.throttling import check_login
+from . import audit
+from .models import AuditEvent
+from .search import MATCHES, ROLE_CHOICES, find_users, page_before
+from .stats import get_user_stats, monthly_growth, users_fragment_version
 
 # --- Helper: Only admin can access ---
 def admin_required(view_func):
@@ -27,14 +30,19 @@ def admin_login(request):
         identifier = request.POST.get('identifier')  # email or username
         password = request.POST.get('password')
 
-        # Try to get username from email if exists
+        # Checked before authenticate() so a burst never reaches the hasher
+        wait = check_login(request, identifier)
+        if wait is not None:
+            messages.error(request, f"Too many login attempts. Try again in {wait} seconds.")
+            return render(request, 'adminpanel/admin_login.html', status=429)
+
+        # UsernameOrEmailBackend resolves username or email in one query
         try:
-            user_obj = User.objects.get(email=identifier)
-            username = user_obj.username
-        except User.DoesNotExist:
-            username = identifier
+            user = authenticate(request, username=identifier, password=password)
+        except HashingBusy:
+            messages.error(request, "The server is busy, please try again.")
+            return render(request, 'adminpanel/admin_login.html')
 
-        user = authenticate(request, username=username, password=password)
         if user and user.is_staff:
             login(request, user)
             return redirect('adminpanel:dashboard')
@@ -49,73 +57,76 @@ def admin_logout(request):
     logout(request)
     return redirect('adminpanel:admin_login')
 
+def error_summary(line):
+    # One JSON record per line (core.jsonlog)
+    try:
+        record = json.loads(line)
+    except ValueError:
+        return line.strip()
+    return f"{record.get('level', 'ERROR')} {record.get('message', '')}"
+
 # --- Dashboard ---
 @admin_required
 def dashboard(request):
-    error_log_path = os.path.join(settings.BASE_DIR, "logs/system_errors.log")
-
-    last_error = None
-    if os.path.exists(error_log_path):
-        with open(error_log_path, "r") as f:
-            lines = f.readlines()
-            last_error = lines[-1].strip() if lines else None
+    # Reads only the last block of the log, and nothing at all if unchanged
+    lines = tail_lines(settings.ERROR_LOG_FILE, 1)
+    last_error = error_summary(lines[-1]) if lines else None
 
     # USERS DATA
-    now = timezone.now()
-    first_day_this_month = now.replace(day=1)
-    first_day_last_month = (first_day_this_month - timedelta(days=1)).replace(day=1)
-
-    # Users created this month
-    users_this_month = User.objects.filter(date_joined__gte=first_day_this_month).count()
-
-    # Users created last month
-    users_last_month = User.objects.filter(
-        date_joined__gte=first_day_last_month,
-        date_joined__lt=first_day_this_month
-    ).count()
-
-    # Calculate percentage growth
-    if users_last_month == 0:
-        monthly_growth = 100 if users_this_month > 0 else 0
-    else:
-        monthly_growth = round(((users_this_month - users_last_month) / users_last_month) * 100, 2)
-
-    # Other statistics
-    users = User.objects.order_by('-date_joined')
-    total_users = User.objects.count()
-    total_admins = User.objects.filter(is_staff=True).count()
-    regular_count = users.filter(is_staff=False, is_superuser=False).count()
-    recent_users = User.objects.order_by('-date_joined')[:5]
+    stats = get_user_stats()
+    # Lazy: not queried at all while the recent users fragment is cached
+    recent_users = User.objects.order_by('-date_joined')[:settings.ADMIN_RECENT_USERS]
 
     context = {
-        "total_users": total_users,
-        "total_admins": total_admins,
+        "total_users": stats["total"],
+        "total_admins": stats["staff"],
         "recent_users": recent_users,
-        "regular_count": regular_count,
+        "regular_count": stats["regular"],
         "last_error": last_error,
-        "monthly_growth": monthly_growth,  
+        "monthly_growth": monthly_growth(stats),
+        # Keys the cached stats and recent users fragments
+        "users_version": users_fragment_version(),
+        "fragment_timeout": settings.ADMIN_FRAGMENT_CACHE_TIMEOUT,
     }
     return render(request, 'adminpanel/dashboard.html', context)
 
 # --- List Users ---
 @admin_required
 def user_list(request):
-    all_users = User.objects.order_by('-date_joined')
+    """
+    Users newest first, searched and filtered through adminpanel.search
+    and paged by the last user shown (?before=), with no count or offset.
+    """
+    filters = {
+        name: request.GET.get(name, '').strip()
+        for name in ('q', 'match', 'role', 'joined_from', 'joined_to')
+    }
+    users = find_users(**filters)
+    before = request.GET.get('before', '')
+    page, next_cursor = page_before(users, before, settings.ADMIN_USER_PAGE_SIZE)
 
-    # Counts from the full queryset
-    admin_count = all_users.filter(is_staff=True, is_superuser=False).count()
-    superadmin_count = all_users.filter(is_superuser=True).count()
-    regular_count = all_users.filter(is_staff=False, is_superuser=False).count()
+    # Counts for the whole table, from one cached aggregate query
+    stats = get_user_stats()
 
-    # Pagination
-    paginator = Paginator(all_users, 10)  # 10 users per page
-    page_number = request.GET.get('page')
-    users = paginator.get_page(page_number)
+    query = request.GET.copy()
+    query.pop('before', None)
+    newest = query.urlencode()
+    older = None
+    if next_cursor:
+        query['before'] = next_cursor
+        older = query.urlencode()
 
     return render(request, "adminpanel/user_list.html", {
-        "users": users,
-        "admin_count": admin_count + superadmin_count,  # total admins
-        "regular_count": regular_count,
+        "users": page,
+        "filters": filters,
+        "matches": MATCHES,
+        "roles": ROLE_CHOICES,
+        "filtered": any(value for name, value in filters.items() if name != 'match'),
+        "total_count": stats["total"],
+        "admin_count": stats["admins"] + stats["superadmins"],  # total admins
+        "regular_count": stats["regular"],
+        "newest_query": newest if before else None,
+        "older_query": older,
     })
 
 
@@ -128,18 +139,15 @@ def add_user(request):
         password = request.POST.get('password')
         is_admin = request.POST.get('is_admin') == 'on'
 
-        if User.objects.filter(username=username).exists():
-            messages.error(request, "Username already exists!")
-        elif User.objects.filter(email=email).exists():
-            messages.error(request, "Email already exists!")
+        try:
+            provision_user(username, email, password, is_staff=is_admin, is_superuser=False)
+        except ProvisioningError as e:
+            messages.error(request, str(e))
+        except HashingBusy:
+            messages.error(request, "The server is busy, please try again.")
         else:
-            new_user = User.objects.create_user(
-                username=username,
-                email=email,
-                password=password,
-                is_staff=is_admin,
-                is_superuser= False
-            )
+            action = AuditEvent.ADMIN_CREATED if is_admin else AuditEvent.USER_CREATED
+            audit.record(request, action, target=username, email=email)
             messages.success(request, f"User '{username}' created successfully!")
             return redirect('adminpanel:user_list')
 
@@ -153,15 +161,14 @@ def add_admin(request):
         email = request.POST.get('email')
         password = request.POST.get('password')
 
-        if User.objects.filter(username=username).exists():
-            messages.error(request, 'Username already exists.')
-        elif User.objects.filter(email=email).exists():
-            messages.error(request, 'Email already exists.')
+        try:
+            provision_user(username, email, password, is_staff=True, is_superuser=False)
+        except ProvisioningError as e:
+            messages.error(request, str(e))
+        except HashingBusy:
+            messages.error(request, "The server is busy, please try again.")
         else:
-            user = User.objects.create_user(username=username, email=email, password=password)
-            user.is_staff = True
-            user.is_superuser = False
-            user.save()
+            audit.record(request, AuditEvent.ADMIN_CREATED, target=username, email=email)
             messages.success(request, f'Admin "{username}" created successfully.')
             return redirect('adminpanel:dashboard')
 
@@ -185,8 +192,51 @@ def delete_user(request, user_id):
 
     if request.method == 'POST':
         username = user.username
+        was_staff = user.is_staff
         user.delete()
+        audit.record(request, AuditEvent.USER_DELETED, target=username, user_id=user_id, was_staff=was_staff)
         messages.success(request, f"User '{username}' deleted successfully!")
         return redirect('adminpanel:user_list')
 
     return render(request, 'adminpanel/delete_user.html', {'user': user})
+
+
+# --- Audit Log ---
+@admin_required
+def audit_log(request):
+    """
+    Newest audit events first, filtered on one indexed column at a time
+    and paged by id (?before=), so no page needs a count or an offset.
+    """
+    events = AuditEvent.objects.order_by('-id')
+    filters = {
+        name: request.GET.get(name, '').strip()
+        for name in ('action', 'actor', 'target')
+    }
+    for name, value in filters.items():
+        if value:
+            events = events.filter(**{name: value})
+
+    before = request.GET.get('before', '')
+    if before.isdigit():
+        events = events.filter(id__lt=int(before))
+
+    page = list(events[:settings.AUDIT_PAGE_SIZE + 1])
+    has_more = len(page) > settings.AUDIT_PAGE_SIZE
+    page = page[:settings.AUDIT_PAGE_SIZE]
+
+    query = request.GET.copy()
+    query.pop('before', None)
+    newest = query.urlencode()
+    older = None
+    if has_more:
+        query['before'] = page[-1].id
+        older = query.urlencode()
+
+    return render(request, 'adminpanel/audit_log.html', {
+        "events": page,
+        "filters": filters,
+        "actions": AuditEvent.ACTIONS,
+        "newest_query": newest if before else None,
+        "older_query": older,
+    })
@@ -4,8 +4,8 @@ from .models import Announcement
 
 @admin.register(Announcement)
 class AnnouncementAdmin(admin.ModelAdmin):
-    list_display = ("title", "active", "created_at", "updated_at")
-    list_filter = ("active", "created_at")
+    list_display = ("title", "active", "platform", "starts_at", "ends_at", "created_at")
+    list_filter = ("active", "platform", "created_at")
     search_fields = ("title", "message")
     ordering = ("-created_at",)
 
@@ -13,6 +13,13 @@ class AnnouncementAdmin(admin.ModelAdmin):
         (None, {
             "fields": ("title", "message", "link", "active")
         }),
+        ("Targeting", {
+            "fields": (
+                "platform", ("min_app_version", "max_app_version"), "locales",
+                ("starts_at", "ends_at"),
+            ),
+            "description": "Blank fields match every client.",
+        }),
         ("Timestamps", {
             "fields": ("created_at", "updated_at"),
             "classes": ("collapse",)
@@ -0,0 +1,206 @@
+# announcements/cache.py
+import hashlib
+import json
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from core import metrics
+
+from .models import Announcement
+from .serializers import AnnouncementSerializer
+from .targeting import EVERYONE, AnnouncementIndex, entry_for
+
+VERSION_KEY = "announcements:active:version"
+ENTRIES_KEY = "announcements:active:entries:{version}"
+
+# Per-process index of the live announcements. It is trusted for
+# ANNOUNCEMENT_CACHE_LOCAL_TTL seconds before the shared version key is
+# consulted again, so a burst of app launches never leaves the worker.
+_local = {"version": None, "index": None, "checked_at": 0.0}
+_lock = threading.Lock()
+
+
+def _local_ttl():
+    return getattr(settings, "ANNOUNCEMENT_CACHE_LOCAL_TTL", 1.0)
+
+
+def _payload_timeout():
+    return getattr(settings, "ANNOUNCEMENT_CACHE_TIMEOUT", 60 * 60 * 24)
+
+
+def get_version():
+    """
+    Returns the current cache version, creating one if the shared cache is empty.
+    """
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+async def aget_version():
+    version = await cache.aget(VERSION_KEY)
+    if version is None:
+        await cache.aadd(VERSION_KEY, uuid.uuid4().hex, None)
+        version = await cache.aget(VERSION_KEY)
+    return version
+
+
+def bump_version():
+    """
+    Invalidates the active announcements everywhere by moving to a new version.
+    """
+    cache.set(VERSION_KEY, uuid.uuid4().hex, None)
+    with _lock:
+        _local.update(version=None, index=None, checked_at=0.0)
+
+
+def payload_for(announcement):
+    """
+    Returns the response body plus its ETag for an Announcement or None.
+
+    There is no Last-Modified: which announcement a client is shown also
+    changes when another is deactivated, ends or is retargeted, none of
+    which touch the updated_at of the one selected. The ETag follows the
+    body itself.
+    """
+    if announcement:
+        data = dict(AnnouncementSerializer(announcement).data)
+    else:
+        data = {"message": None}
+
+    body = json.dumps(data, cls=DjangoJSONEncoder, sort_keys=True)
+    return {
+        "data": data,
+        "etag": '"%s"' % hashlib.sha1(body.encode()).hexdigest(),
+    }
+
+
+NO_ANNOUNCEMENT = payload_for(None)
+
+
+def build_entries(now=None):
+    """
+    Queries the database for the live announcements, newest first, as
+    targeting entries.
+    """
+    return [entry_for(a, payload_for(a)) for a in Announcement.live(now or timezone.now())]
+
+
+async def abuild_entries(now=None):
+    return [entry_for(a, payload_for(a)) async for a in Announcement.live(now or timezone.now())]
+
+
+def _on_schedule(index):
+    """
+    Rebuilds the index from its own entries once a start or end time has
+    passed; no cache or database access is needed for that.
+    """
+    now = timezone.now()
+    if not index.expired(now):
+        return index
+    current = AnnouncementIndex(index.entries, now, NO_ANNOUNCEMENT)
+    with _lock:
+        if _local["index"] is index:
+            _local["index"] = current
+    return current
+
+
+def _local_index(now, version=None):
+    """
+    Returns this process's index if it is still fresh, or still current
+    for the given shared version.
+    """
+    with _lock:
+        if _local["index"] is None:
+            return None
+        if version is None:
+            if now - _local["checked_at"] >= _local_ttl():
+                return None
+        elif _local["version"] == version:
+            _local["checked_at"] = now
+        else:
+            return None
+        metrics.inc("smartcalc_announcement_cache_total", {"layer": "local"})
+        return _local["index"]
+
+
+def _keep_local(version, entries, now):
+    index = AnnouncementIndex(entries, timezone.now(), NO_ANNOUNCEMENT)
+    with _lock:
+        _local.update(version=version, index=index, checked_at=now)
+    return index
+
+
+def get_index():
+    """
+    Returns the index of live announcements.
+
+    The database is only queried when neither the process nor the shared
+    cache holds the entries for the current version.
+    """
+    now = time.monotonic()
+    index = _local_index(now)
+    if index is not None:
+        return _on_schedule(index)
+
+    version = get_version()
+    index = _local_index(now, version)
+    if index is not None:
+        return _on_schedule(index)
+
+    key = ENTRIES_KEY.format(version=version)
+    entries = cache.get(key)
+    if entries is None:
+        entries = build_entries()
+        cache.set(key, entries, _payload_timeout())
+        metrics.inc("smartcalc_announcement_cache_total", {"layer": "miss"})
+    else:
+        metrics.inc("smartcalc_announcement_cache_total", {"layer": "shared"})
+
+    return _keep_local(version, entries, now)
+
+
+async def aget_index(fresh=False):
+    """
+    Async get_index() for the ASGI views; a local hit never leaves the
+    event loop. fresh=True always checks the shared version.
+    """
+    now = time.monotonic()
+    index = None if fresh else _local_index(now)
+    if index is not None:
+        return _on_schedule(index)
+
+    version = await aget_version()
+    index = _local_index(now, version)
+    if index is not None:
+        return _on_schedule(index)
+
+    key = ENTRIES_KEY.format(version=version)
+    entries = await cache.aget(key)
+    if entries is None:
+        entries = await abuild_entries()
+        await cache.aset(key, entries, _payload_timeout())
+        metrics.inc("smartcalc_announcement_cache_total", {"layer": "miss"})
+    else:
+        metrics.inc("smartcalc_announcement_cache_total", {"layer": "shared"})
+
+    return _keep_local(version, entries, now)
+
+
+def get_active_payload(target=EVERYONE):
+    """
+    Returns the cached payload of the announcement to show target.
+    """
+    return get_index().select(target)
+
+
+async def aget_active_payload(target=EVERYONE):
+    return (await aget_index()).select(target)
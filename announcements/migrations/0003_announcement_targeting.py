@@ -0,0 +1,51 @@
+# Generated by Django 5.2.8 on 2026-10-18 09:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('announcements', '0002_alter_announcement_link_alter_announcement_message'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='announcement',
+            name='ends_at',
+            field=models.DateTimeField(blank=True, help_text='Stop showing at this time. Blank to show until deactivated.', null=True),
+        ),
+        migrations.AddField(
+            model_name='announcement',
+            name='locales',
+            field=models.CharField(blank=True, help_text='Comma-separated language codes, e.g. "en, pt-BR". Blank for every locale.', max_length=200),
+        ),
+        migrations.AddField(
+            model_name='announcement',
+            name='max_app_version',
+            field=models.CharField(blank=True, help_text='Only show to app versions older than this one.', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='announcement',
+            name='min_app_version',
+            field=models.CharField(blank=True, help_text='Only show to this app version and newer, e.g. 2.4.0.', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='announcement',
+            name='platform',
+            field=models.CharField(blank=True, choices=[('android', 'Android'), ('ios', 'iOS'), ('web', 'Web')], help_text='Only show on this platform. Blank for every platform.', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='announcement',
+            name='starts_at',
+            field=models.DateTimeField(blank=True, help_text='Show from this time. Blank to show at once.', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='announcement',
+            index=models.Index(fields=['active', 'created_at'], name='announcement_active_created'),
+        ),
+        migrations.AddIndex(
+            model_name='announcement',
+            index=models.Index(fields=['active', 'ends_at', 'starts_at'], name='announcement_active_schedule'),
+        ),
+    ]
@@ -1,5 +1,10 @@
 # announcements/models.py
+from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models import Q
+
+from .targeting import PLATFORMS, parse_version
+
 
 class Announcement(models.Model):
     """
@@ -15,6 +20,37 @@ class Announcement(models.Model):
         default=True,
         help_text="If true the mobile app should display this announcement."
     )
+    platform = models.CharField(
+        max_length=10,
+        blank=True,
+        choices=list(PLATFORMS.items()),
+        help_text="Only show on this platform. Blank for every platform."
+    )
+    min_app_version = models.CharField(
+        max_length=20,
+        blank=True,
+        help_text="Only show to this app version and newer, e.g. 2.4.0."
+    )
+    max_app_version = models.CharField(
+        max_length=20,
+        blank=True,
+        help_text="Only show to app versions older than this one."
+    )
+    locales = models.CharField(
+        max_length=200,
+        blank=True,
+        help_text="Comma-separated language codes, e.g. \"en, pt-BR\". Blank for every locale."
+    )
+    starts_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Show from this time. Blank to show at once."
+    )
+    ends_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Stop showing at this time. Blank to show until deactivated."
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -22,13 +58,47 @@ class Announcement(models.Model):
         ordering = ['-created_at']
         verbose_name = "Announcement"
         verbose_name_plural = "Announcements"
+        indexes = [
+            # Read backwards by newest_active(), so results come out in
+            # (-created_at, -id) order without a sort
+            models.Index(fields=['active', 'created_at'], name='announcement_active_created'),
+            models.Index(fields=['active', 'ends_at', 'starts_at'], name='announcement_active_schedule'),
+        ]
 
     def __str__(self):
         return f"{self.title or self.message[:40]}{' (active)' if self.active else ''}"
 
+    def clean(self):
+        errors = {}
+        for field in ('min_app_version', 'max_app_version'):
+            if getattr(self, field) and parse_version(getattr(self, field)) is None:
+                errors[field] = "Enter a version number such as 2.4.0."
+        if errors:
+            raise ValidationError(errors)
+
+        low, high = parse_version(self.min_app_version), parse_version(self.max_app_version)
+        if low is not None and high is not None and low >= high:
+            raise ValidationError({'max_app_version': "Must be higher than the minimum version."})
+        if self.starts_at and self.ends_at and self.starts_at >= self.ends_at:
+            raise ValidationError({'ends_at': "Must be after the start time."})
+
+    @classmethod
+    def newest_active(cls):
+        """
+        Active announcements, newest first. Every active announcement lookup
+        starts from this queryset, which walks announcement_active_created
+        instead of sorting the table.
+        """
+        # active=True is rendered as a bare "WHERE active" on SQLite, which
+        # cannot use the index; IN (True) is an equality on every backend.
+        # The id tie-break costs nothing: SQLite (rowid) and InnoDB both end
+        # every secondary index with the primary key.
+        return cls.objects.filter(active__in=[True]).order_by('-created_at', '-id')
+
     @classmethod
-    def latest_active(cls):
+    def live(cls, now):
         """
-        Returns the latest active Announcement or None.
+        Active announcements that have not ended by now, newest first,
+        including those scheduled to start later.
         """
-        return cls.objects.filter(active=True).order_by('-created_at').first()
+        return cls.newest_active().filter(Q(ends_at__isnull=True) | Q(ends_at__gt=now))
@@ -0,0 +1,86 @@
+# announcements/notify.py
+"""
+Wakes long-polling clients when the active announcement changes.
+
+The shared cache version key (see announcements.cache) already moves on
+every announcement save, in every process. Each worker runs one watcher
+task, only while somebody is waiting, that reads that key every
+ANNOUNCEMENT_WATCH_INTERVAL seconds. Saves made in the same worker wake
+it at once. Each round the watcher gets the targeting index once and
+selects from it in memory for every waiting request, so a worker holding
+thousands of clients still does one cache read per interval, and
+scheduled announcements reach waiting clients when they start.
+"""
+
+import asyncio
+import threading
+
+from django.conf import settings
+
+from .cache import aget_index
+
+
+class AnnouncementNotifier:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._waiters = {}  # future -> (ETag the client already has, Target)
+        self._loop = None
+        self._task = None
+        self._wake = None
+
+    async def wait(self, since, timeout, target):
+        """
+        Returns the payload selected for target once its ETag differs from
+        since, or None if that does not happen within timeout seconds.
+        """
+        payload = (await aget_index()).select(target)
+        if payload["etag"] != since:
+            return payload
+        if timeout <= 0:
+            return None
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._waiters[future] = (since, target)
+        self._start_watcher(loop)
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            self._waiters.pop(future, None)
+
+    def poke(self):
+        """
+        Makes the watcher check the version now; safe from any thread.
+        """
+        with self._lock:
+            loop, wake = self._loop, self._wake
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(wake.set)
+
+    def _start_watcher(self, loop):
+        if self._task is not None and not self._task.done() and self._loop is loop:
+            return
+        with self._lock:
+            self._loop = loop
+            self._wake = asyncio.Event()
+        self._task = loop.create_task(self._watch())
+
+    async def _watch(self):
+        while self._waiters:
+            # Cleared before the read, so a poke() during it is not lost
+            self._wake.clear()
+            index = await aget_index(fresh=True)
+            for future, (since, target) in list(self._waiters.items()):
+                payload = index.select(target)
+                if since != payload["etag"] and not future.done():
+                    future.set_result(payload)
+
+            try:
+                await asyncio.wait_for(self._wake.wait(), settings.ANNOUNCEMENT_WATCH_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+
+notifier = AnnouncementNotifier()
@@ -0,0 +1,22 @@
+# announcements/signals.py
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .cache import bump_version
+from .models import Announcement
+from .notify import notifier
+
+
+def announcement_changed():
+    bump_version()
+    # Long-polls held by this worker hear about it without waiting for
+    # the next version check.
+    notifier.poke()
+
+
+@receiver(post_save, sender=Announcement)
+@receiver(post_delete, sender=Announcement)
+def invalidate_active_announcement(sender, instance, **kwargs):
+    # Wait for the commit so no worker can cache the pre-change row
+    # under the new version.
+    transaction.on_commit(announcement_changed)
@@ -0,0 +1,202 @@
+# announcements/targeting.py
+"""
+Picks the announcement a client should see from its platform, app version
+and locale.
+
+AnnouncementIndex is built once per announcement change from the live
+announcements, newest first. For each platform it splits the version axis
+at every announcement's minimum and maximum version and records, for
+every resulting version range and locale, the newest announcement that
+covers it. select() is then one bisect and at most three list lookups,
+however many announcements are live. Announcements scheduled for later
+are left out until the first start or end time passes, when the index is
+rebuilt from the same entries (see announcements.cache).
+"""
+
+import bisect
+import re
+from collections import namedtuple
+
+PLATFORMS = {"android": "Android", "ios": "iOS", "web": "Web"}
+ANY_PLATFORM = ""  # clients that do not say which platform they run on
+
+# version is a tuple from parse_version(), locale a lowercase language tag
+Target = namedtuple("Target", ["platform", "version", "locale"], defaults=(ANY_PLATFORM, None, None))
+EVERYONE = Target()
+
+_VERSION_RE = re.compile(r"\d+(?:\.\d+)*")
+
+
+def parse_version(value):
+    """
+    "2.10.1", "v2.10.1-beta" -> (2, 10, 1); "2.0" -> (2,). None if there
+    is no version number.
+    """
+    match = _VERSION_RE.match(value.strip().lstrip("vV")) if value else None
+    if not match:
+        return None
+    parts = [int(part) for part in match.group().split(".")]
+    while len(parts) > 1 and parts[-1] == 0:
+        parts.pop()
+    return tuple(parts)
+
+
+def normalize_locale(value):
+    locale = (value or "").strip().replace("_", "-").lower()
+    return locale if locale and locale != "*" else None
+
+
+def locale_keys(locale):
+    """
+    "pt-br" matches announcements for "pt-br" and for "pt".
+    """
+    if locale is None:
+        return ()
+    language = locale.split("-", 1)[0]
+    return (locale, language) if language != locale else (locale,)
+
+
+def target_from_request(request):
+    """
+    Reads ?platform=, ?version= and ?locale=, falling back to the first
+    Accept-Language tag for the locale.
+    """
+    platform = request.GET.get("platform", "").strip().lower()
+    locale = request.GET.get("locale")
+    if not locale:
+        locale = request.headers.get("Accept-Language", "").split(",")[0].split(";")[0]
+    return Target(
+        platform if platform in PLATFORMS else ANY_PLATFORM,
+        parse_version(request.GET.get("version")),
+        normalize_locale(locale),
+    )
+
+
+def entry_for(announcement, payload):
+    """
+    The targeting rules of an Announcement with its response payload, as
+    kept in the shared cache and indexed by AnnouncementIndex.
+    """
+    return {
+        "platform": announcement.platform,
+        "min_version": parse_version(announcement.min_app_version),
+        "max_version": parse_version(announcement.max_app_version),
+        "locales": tuple(filter(None, map(normalize_locale, announcement.locales.split(",")))),
+        "starts_at": announcement.starts_at,
+        "ends_at": announcement.ends_at,
+        "payload": payload,
+    }
+
+
+def _next_free(skip, slot):
+    # Union-find "next unclaimed slot" with path compression
+    root = slot
+    while skip[root] != root:
+        root = skip[root]
+    while skip[slot] != root:
+        skip[slot], slot = root, skip[slot]
+    return root
+
+
+class PlatformTable:
+    """
+    The newest announcement per (version range, locale) for one platform.
+
+    bounds are the sorted version boundaries; slot i is the range
+    [bounds[i - 1], bounds[i]). ranks[locale][slot] is the position of the
+    newest covering announcement in the live list, or None. Clients that
+    send no version only see announcements without version limits, held
+    in unversioned[locale].
+    """
+
+    def __init__(self, entries):
+        self.bounds = sorted({
+            version
+            for _, entry in entries
+            for version in (entry["min_version"], entry["max_version"])
+            if version is not None
+        })
+        slots = len(self.bounds) + 1
+        self.ranks = {}
+        self.unversioned = {}
+        skips = {}
+
+        # Newest first, so each slot is claimed once, by its newest entry
+        for rank, entry in entries:
+            low, high = entry["min_version"], entry["max_version"]
+            first = 0 if low is None else bisect.bisect_left(self.bounds, low) + 1
+            end = slots if high is None else bisect.bisect_left(self.bounds, high) + 1
+
+            for locale in entry["locales"] or (None,):
+                if low is None and high is None:
+                    self.unversioned.setdefault(locale, rank)
+                if locale not in self.ranks:
+                    self.ranks[locale] = [None] * slots
+                    skips[locale] = list(range(slots + 1))
+                ranks, skip = self.ranks[locale], skips[locale]
+                slot = _next_free(skip, first)
+                while slot < end:
+                    ranks[slot] = rank
+                    skip[slot] = slot + 1
+                    slot = _next_free(skip, slot + 1)
+
+    def newest(self, version, locale):
+        if version is not None:
+            slot = bisect.bisect_right(self.bounds, version)
+        best = None
+        for key in locale_keys(locale) + (None,):
+            if version is None:
+                rank = self.unversioned.get(key)
+            else:
+                ranks = self.ranks.get(key)
+                rank = ranks[slot] if ranks is not None else None
+            if rank is not None and (best is None or rank < best):
+                best = rank
+        return best
+
+
+class AnnouncementIndex:
+    """
+    Selects announcements for targets from entries (newest first) as of now.
+    """
+
+    def __init__(self, entries, now, empty):
+        self.entries = entries
+        self.empty = empty
+        self.expires_at = None  # first start or end time after now
+        self.live = []
+        for entry in entries:
+            starts_at, ends_at = entry["starts_at"], entry["ends_at"]
+            if ends_at is not None and ends_at <= now:
+                continue
+            if starts_at is not None and starts_at > now:
+                self._expire_at(starts_at)
+                continue
+            if ends_at is not None:
+                self._expire_at(ends_at)
+            self.live.append(entry)
+
+        ranked = list(enumerate(self.live))
+        self.tables = {
+            platform: PlatformTable([
+                (rank, entry) for rank, entry in ranked
+                if entry["platform"] in (ANY_PLATFORM, platform)
+            ])
+            for platform in (ANY_PLATFORM, *PLATFORMS)
+        }
+
+    def _expire_at(self, moment):
+        if self.expires_at is None or moment < self.expires_at:
+            self.expires_at = moment
+
+    def expired(self, now):
+        return self.expires_at is not None and now >= self.expires_at
+
+    def select(self, target):
+        """
+        Returns the payload of the newest announcement targeting target,
+        or the empty payload.
+        """
+        table = self.tables.get(target.platform, self.tables[ANY_PLATFORM])
+        rank = table.newest(target.version, target.locale)
+        return self.empty if rank is None else self.live[rank]["payload"]
@@ -0,0 +1,53 @@
+import json
+
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from .models import Announcement
+
+INDEX = "announcement_active_created"
+
+
+def _values(plan, name):
+    """All values of name anywhere in a MySQL JSON plan."""
+    if isinstance(plan, dict):
+        found = [plan[name]] if name in plan else []
+        return found + [v for value in plan.values() for v in _values(value, name)]
+    if isinstance(plan, list):
+        return [v for value in plan for v in _values(value, name)]
+    return []
+
+
+class ActiveAnnouncementQueryPlanTests(TestCase):
+    """
+    The active announcement lookups must read announcement_active_created
+    in index order, not scan and sort the whole table.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        Announcement.objects.bulk_create(
+            Announcement(message=f"old {i}", active=False) for i in range(200)
+        )
+        Announcement.objects.bulk_create(Announcement(message=f"live {i}") for i in range(5))
+
+    def assertUsesIndex(self, queryset):
+        if connection.vendor == "sqlite":
+            plan = queryset.explain()
+            self.assertIn(f"USING INDEX {INDEX} (active=?)", plan)
+            self.assertNotIn("TEMP B-TREE", plan)
+        elif connection.vendor == "mysql":
+            plan = json.loads(queryset.explain(format="json"))
+            self.assertEqual(_values(plan, "key"), [INDEX])
+            self.assertNotIn(True, _values(plan, "using_filesort"))
+        else:
+            self.skipTest(f"no query plan assertions for {connection.vendor}")
+
+    def test_newest_active_uses_index(self):
+        self.assertUsesIndex(Announcement.newest_active()[:1])
+        self.assertEqual(Announcement.newest_active().first().message, "live 4")
+
+    def test_live_uses_index(self):
+        self.assertUsesIndex(Announcement.live(timezone.now()))
+        self.assertEqual(len(Announcement.live(timezone.now())), 5)
@@ -1,7 +1,15 @@
 
+from django.conf import settings
 from django.urls import path
-from .views import get_active_announcement
+from .views import (
+    get_active_announcement, get_active_announcement_async, wait_for_announcement,
+)
 
 urlpatterns = [
-    path("active/", get_active_announcement, name="active-announcement"),
+    path(
+        "active/",
+        get_active_announcement_async if settings.ASGI_MODE else get_active_announcement,
+        name="active-announcement",
+    ),
+    path("active/wait/", wait_for_announcement, name="active-announcement-wait"),
 ]
@@ -1,15 +1,87 @@
 # announcements/views.py
+from django.conf import settings
+from django.http import HttpResponseNotModified, JsonResponse
+from django.utils.cache import get_conditional_response
+from django.views.decorators.http import condition, require_safe
+from django.views.decorators.vary import vary_on_headers
 from rest_framework.response import Response
 from rest_framework.decorators import api_view
-from .models import Announcement
-from .serializers import AnnouncementSerializer
+from core import metrics
+from .cache import aget_active_payload, get_active_payload
+from .notify import notifier
+from .targeting import target_from_request
 
+
+def active_announcement_etag(request):
+    # Called once for every GET, including those answered with a 304
+    metrics.inc("smartcalc_announcement_fetches_total")
+    return get_active_payload(target_from_request(request))["etag"]
+
+
+# Conditional GETs are answered from the cache with a 304 before DRF runs.
+# The locale may come from Accept-Language, so responses vary on it.
+@vary_on_headers("Accept-Language")
+@condition(etag_func=active_announcement_etag)
 @api_view(["GET"])
 def get_active_announcement(request):
-    announcement = Announcement.objects.filter(active=True).order_by("-created_at").first()
+    """
+    The newest live announcement for the client's ?platform=, ?version=
+    and ?locale= (see announcements.targeting).
+    """
+    payload = get_active_payload(target_from_request(request))
+    return Response(payload["data"], status=200)
+
+
+def _payload_response(payload):
+    response = JsonResponse(payload["data"])
+    response["ETag"] = payload["etag"]
+    return response
+
+
+@vary_on_headers("Accept-Language")
+@require_safe
+async def get_active_announcement_async(request):
+    """
+    ASGI_MODE version of get_active_announcement with the same validators.
+
+    condition() would call the validator functions synchronously, so the
+    conditional response is worked out here from the awaited payload.
+    """
+    metrics.inc("smartcalc_announcement_fetches_total")
+    payload = await aget_active_payload(target_from_request(request))
+
+    response = get_conditional_response(request, etag=payload["etag"])
+    if response is None:
+        return _payload_response(payload)
+    response["ETag"] = payload["etag"]
+    return response
+
+
+@vary_on_headers("Accept-Language")
+@require_safe
+async def wait_for_announcement(request):
+    """
+    Long-poll for a change to the announcement selected for the client's
+    targeting parameters, as on active/.
 
-    if not announcement:
-        return Response({"message": None}, status=200)
+    ?since= (or If-None-Match) is the ETag the client already has. A
+    different current announcement is returned at once; otherwise the
+    request is held until one is published (200) or until ?timeout=
+    seconds, at most ANNOUNCEMENT_LONGPOLL_TIMEOUT, pass (304). Requests
+    are only held under ASGI_MODE, where waiting costs no worker thread.
+    """
+    since = request.GET.get("since") or request.headers.get("If-None-Match")
+    try:
+        timeout = float(request.GET.get("timeout", settings.ANNOUNCEMENT_LONGPOLL_TIMEOUT))
+    except ValueError:
+        timeout = settings.ANNOUNCEMENT_LONGPOLL_TIMEOUT
+    timeout = min(timeout, settings.ANNOUNCEMENT_LONGPOLL_TIMEOUT) if settings.ASGI_MODE else 0
 
-    serializer = AnnouncementSerializer(announcement)
-    return Response(serializer.data, status=200)
+    payload = await notifier.wait(since, timeout, target_from_request(request))
+    if payload is None:
+        metrics.inc("smartcalc_announcement_waits_total", {"result": "unchanged"})
+        response = HttpResponseNotModified()
+        response["ETag"] = since
+        return response
+    metrics.inc("smartcalc_announcement_waits_total", {"result": "changed"})
+    return _payload_response(payload)
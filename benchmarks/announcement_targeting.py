@@ -0,0 +1,123 @@
+"""
+Announcement selection cost against the number of live announcements.
+
+    python benchmarks/announcement_targeting.py [--announcements 10,1000,5000]
+        [--lookups 20000] [--seed 1]
+
+Generates narrowly targeted announcements (unsaved, so no database is
+needed) with random platform, version range, locale and schedule rules, and
+random client
+targets, then times building the AnnouncementIndex and selecting from it,
+against scanning the announcements newest first for the first match,
+which is what filtering per request would cost.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.utils import timezone  # noqa: E402
+
+from announcements.models import Announcement  # noqa: E402
+from announcements.targeting import (  # noqa: E402
+    PLATFORMS, AnnouncementIndex, Target, entry_for, locale_keys, parse_version,
+)
+
+LOCALES = ["en", "en-us", "pt", "pt-br", "es", "fr", "de", "ja"]
+
+
+def random_version(rng):
+    return f"{rng.randint(1, 6)}.{rng.randint(0, 9)}.{rng.randint(0, 9)}"
+
+
+def announcements(rng, count, now):
+    for i in range(count):
+        low, high = sorted([random_version(rng), random_version(rng)], key=parse_version)
+        yield Announcement(
+            id=i,
+            platform=rng.choice(list(PLATFORMS)),
+            min_app_version=low if rng.random() < 0.9 else "",
+            max_app_version=high if rng.random() < 0.8 else "",
+            locales=", ".join(rng.sample(LOCALES, rng.randint(1, 2))) if rng.random() < 0.8 else "",
+            starts_at=now + timedelta(hours=rng.choice([-2, 2])) if rng.random() < 0.2 else None,
+            ends_at=now + timedelta(hours=rng.choice([-1, 3])) if rng.random() < 0.2 else None,
+        )
+
+
+def targets(rng, count):
+    return [
+        Target(
+            rng.choice(["", *PLATFORMS]),
+            tuple(int(part) for part in random_version(rng).split(".")) if rng.random() < 0.9 else None,
+            rng.choice(LOCALES + [None]),
+        )
+        for _ in range(count)
+    ]
+
+
+def scan(entries, target, now):
+    """The first matching entry, checked one by one."""
+    for entry in entries:
+        if entry["ends_at"] is not None and entry["ends_at"] <= now:
+            continue
+        if entry["starts_at"] is not None and entry["starts_at"] > now:
+            continue
+        if entry["platform"] not in ("", target.platform):
+            continue
+        low, high = entry["min_version"], entry["max_version"]
+        if target.version is None:
+            if low is not None or high is not None:
+                continue
+        elif (low is not None and target.version < low) or (high is not None and target.version >= high):
+            continue
+        if entry["locales"] and not set(locale_keys(target.locale)) & set(entry["locales"]):
+            continue
+        return entry["payload"]
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--announcements", default="10,1000,5000")
+    parser.add_argument("--lookups", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    now = timezone.now()
+    lookups = targets(rng, args.lookups)
+
+    print(f"{'announcements':>13} {'build ms':>9} {'index us':>9} {'scan us':>9}")
+    for count in (int(c) for c in args.announcements.split(",")):
+        entries = [entry_for(a, a.id) for a in announcements(rng, count, now)]
+
+        start = time.perf_counter()
+        index = AnnouncementIndex(entries, now, None)
+        build = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for target in lookups:
+            index.select(target)
+        indexed = (time.perf_counter() - start) / len(lookups)
+
+        start = time.perf_counter()
+        for target in lookups:
+            scan(entries, target, now)
+        scanned = (time.perf_counter() - start) / len(lookups)
+
+        print(f"{count:>13} {build * 1000:9.1f} {indexed * 1e6:9.2f} {scanned * 1e6:9.2f}")
+
+
+if __name__ == "__main__":
+    main()
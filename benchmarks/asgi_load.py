@@ -0,0 +1,185 @@
+"""
+Sync (WSGI) vs async (ASGI_MODE) throughput and latency under many connections.
+
+    python benchmarks/asgi_load.py --username bench [--connections 1000]
+        [--duration 20] [--workers 2] [--port 8765]
+
+Boots gunicorn from gunicorn.conf.py twice on a local port, once per mode,
+against the configured database, and drives each endpoint from
+--connections concurrent keep-alive clients for --duration seconds:
+
+    /api/announcements/active/   anonymous
+    /api/users/me/               with an access token for --username
+    /api/token/refresh/          each client rotating its own refresh token
+
+Needs gunicorn, uvicorn and uvicorn-worker, an existing user, and a file
+descriptor limit (ulimit -n) above --connections.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth.models import User  # noqa: E402
+
+from users.serializers import CustomLoginSerializer  # noqa: E402
+
+
+class Connection:
+    """A minimal HTTP/1.1 keep-alive client on asyncio streams."""
+
+    def __init__(self, host, port):
+        self.host, self.port = host, port
+        self.reader = self.writer = None
+
+    async def request(self, method, path, headers=None, body=b""):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {self.host}",
+                 f"Content-Length: {len(body)}"]
+        lines += [f"{k}: {v}" for k, v in (headers or {}).items()]
+        self.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode() + body)
+
+        try:
+            status, response_headers, content = await self.read_response()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            self.close()
+            raise
+        if response_headers.get("connection", "").lower() == "close":
+            self.close()
+        return status, content
+
+    async def read_response(self):
+        head = await self.reader.readuntil(b"\r\n\r\n")
+        status_line, *header_lines = head.decode("latin-1").split("\r\n")
+        headers = {}
+        for line in filter(None, header_lines):
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if "content-length" in headers:
+            content = await self.reader.readexactly(int(headers["content-length"]))
+        elif headers.get("transfer-encoding") == "chunked":
+            content = b""
+            while True:
+                size = int((await self.reader.readline()).strip(), 16)
+                content += await self.reader.readexactly(size + 2)
+                if not size:
+                    break
+        else:
+            content = await self.reader.read()
+            headers["connection"] = "close"
+        return int(status_line.split()[1]), headers, content
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+async def client(host, port, endpoint, token, deadline, latencies, errors):
+    connection = Connection(host, port)
+    refresh = token
+    while time.perf_counter() < deadline:
+        if endpoint == "refresh":
+            args = ("POST", "/api/token/refresh/", {"Content-Type": "application/json"},
+                    json.dumps({"refresh": refresh}).encode())
+        elif endpoint == "me":
+            args = ("GET", "/api/users/me/", {"Authorization": f"Bearer {token}"})
+        else:
+            args = ("GET", "/api/announcements/active/")
+
+        start = time.perf_counter()
+        try:
+            status, content = await connection.request(*args)
+        except (OSError, asyncio.IncompleteReadError):
+            errors.append(None)
+            await asyncio.sleep(0.1)
+            continue
+        latencies.append(time.perf_counter() - start)
+        if status != 200:
+            errors.append(status)
+        elif endpoint == "refresh":
+            refresh = json.loads(content)["refresh"]
+    connection.close()
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+
+
+async def drive(port, endpoint, tokens, duration):
+    latencies, errors = [], []
+    deadline = time.perf_counter() + duration
+    await asyncio.gather(*(
+        client("127.0.0.1", port, endpoint, token, deadline, latencies, errors)
+        for token in tokens
+    ))
+    return len(latencies) / duration, percentile(latencies, 0.5), percentile(latencies, 0.99), len(errors)
+
+
+def wait_for_port(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise SystemExit(f"gunicorn did not start on port {port}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--username", required=True)
+    parser.add_argument("--connections", type=int, default=1000)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    user = User.objects.get(username=args.username)
+    access = str(CustomLoginSerializer.get_token(user).access_token_for(user))
+
+    print(f"{'mode':<6} {'endpoint':<13} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for mode in ("sync", "async"):
+        work = {
+            "announcement": [None] * args.connections,
+            "me": [access] * args.connections,
+            # One refresh token chain per client; tokens rotate as they are used
+            "refresh": [str(CustomLoginSerializer.get_token(user)) for _ in range(args.connections)],
+        }
+        env = {**os.environ, "ASGI_MODE": str(mode == "async"), "PERF_LOG_SAMPLE_RATE": "0"}
+        server = subprocess.Popen(
+            ["gunicorn", "--config", "gunicorn.conf.py", "--bind", f"127.0.0.1:{args.port}",
+             "--workers", str(args.workers), "--log-level", "warning"],
+            cwd=ROOT, env=env,
+        )
+        try:
+            wait_for_port(args.port)
+            for endpoint, tokens in work.items():
+                rate, p50, p99, errors = asyncio.run(drive(args.port, endpoint, tokens, args.duration))
+                print(f"{mode:<6} {endpoint:<13} {rate:9.0f} {p50 * 1000:8.1f} {p99 * 1000:8.1f} {errors:>7}")
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
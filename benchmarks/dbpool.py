@@ -0,0 +1,78 @@
+"""
+Load benchmark for core.dbpool with SQLite standing in for MySQL.
+
+    python benchmarks/dbpool.py [--threads 8] [--requests 2000] [--pool-size 4]
+                                [--connect-latency 20]
+
+Every simulated request opens a connection, runs one query and closes it,
+either directly ("no pool") or through ConnectionPool. --connect-latency
+adds a sleep to each new connection to model the TCP + auth handshake of
+a remote MySQL server, which is the cost the pool removes.
+"""
+
+import argparse
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.dbpool import ConnectionPool  # noqa: E402
+
+
+def make_connect(path, latency):
+    def connect():
+        time.sleep(latency)
+        return sqlite3.connect(path, check_same_thread=False)
+    return connect
+
+
+def run(threads, requests, acquire, release):
+    per_thread = requests // threads
+
+    def worker():
+        for _ in range(per_thread):
+            conn = acquire()
+            conn.execute("SELECT 1").fetchone()
+            release(conn)
+
+    start = time.perf_counter()
+    pool_threads = [threading.Thread(target=worker) for _ in range(threads)]
+    for t in pool_threads:
+        t.start()
+    for t in pool_threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    return per_thread * threads / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--pool-size", type=int, default=4)
+    parser.add_argument("--connect-latency", type=float, default=20, help="ms")
+    args = parser.parse_args()
+
+    with tempfile.NamedTemporaryFile(suffix=".sqlite3") as db:
+        connect = make_connect(db.name, args.connect_latency / 1000)
+
+        rate = run(args.threads, args.requests, connect, lambda conn: conn.close())
+        print(f"no pool      {rate:10.0f} req/s")
+
+        pool = ConnectionPool(connect, max_size=args.pool_size,
+                              ping=lambda conn: conn.execute("SELECT 1"))
+        rate = run(args.threads, args.requests, pool.acquire, pool.release)
+        print(f"pool (size {args.pool_size}) {rate:8.0f} req/s")
+        pool.close_all()
+
+        stats = pool.stats()
+        print("pool stats   hits {hits}  misses {misses}  waits {waits}  "
+              "wait_time {wait_time:.3f}s".format(**stats))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Login throughput per hasher: password verifications per second and per core.
+
+    python benchmarks/password_hashing.py [--seconds 3] [--threads 16]
+
+Each hasher is measured single-threaded and with --threads request
+threads sharing the users.hashing executor, the way concurrent logins do.
+Argon2 is skipped when argon2-cffi is not installed. Cost parameters come
+from the PASSWORD_* settings, so they can be tuned through the environment.
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.utils.module_loading import import_string  # noqa: E402
+
+from users.hashing import get_executor  # noqa: E402
+
+HASHERS = [
+    "users.hashers.TunedPBKDF2PasswordHasher",
+    "users.hashers.TunedScryptPasswordHasher",
+    "users.hashers.TunedArgon2PasswordHasher",
+]
+
+
+def verifications_per_second(verify, threads, seconds):
+    count = [0] * threads
+    deadline = time.perf_counter() + seconds
+
+    def worker(i):
+        while time.perf_counter() < deadline:
+            verify()
+            count[i] += 1
+
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    return sum(count) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=3)
+    parser.add_argument("--threads", type=int, default=16)
+    args = parser.parse_args()
+
+    executor = get_executor()
+    cores = settings.PASSWORD_HASHING_WORKERS
+    print(f"executor workers: {cores}")
+    print(f"{'hasher':<28} {'1 thread/s':>11} {'pooled/s':>10} {'per core/s':>11}")
+
+    for path in HASHERS:
+        hasher = import_string(path)()
+        try:
+            encoded = hasher.encode("correct horse", hasher.salt())
+        except ValueError as e:
+            print(f"{hasher.algorithm:<28} skipped ({e})")
+            continue
+
+        def verify():
+            hasher.verify("correct horse", encoded)
+
+        single = verifications_per_second(verify, 1, args.seconds)
+        pooled = verifications_per_second(
+            lambda: executor.run(verify), args.threads, args.seconds
+        )
+        print(f"{hasher.algorithm:<28} {single:11.1f} {pooled:10.1f} {pooled / cores:11.1f}")
+
+    print("executor stats:", executor.stats())
+
+
+if __name__ == "__main__":
+    main()
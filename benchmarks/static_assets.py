@@ -0,0 +1,112 @@
+"""
+Admin panel page weight and static file latency, before and after the
+static asset pipeline changes.
+
+    python benchmarks/static_assets.py [--requests 2000]
+
+Runs against a throwaway in-memory test database with DEBUG off and
+collects static files into temporary directories. "before" is plain
+StaticFilesStorage with WhiteNoise at the end of MIDDLEWARE; "after" is
+the current settings (hashed, Brotli/gzip precompressed files served
+right after SecurityMiddleware). Page weight is the dashboard HTML plus its local
+assets as a browser sending "Accept-Encoding: br, gzip" downloads them, on
+a first visit and on a repeat visit, where assets not marked immutable
+are fetched again.
+"""
+
+import argparse
+import os
+import re
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth.models import User  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import Client, override_settings  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+
+ASSET_RE = re.compile(r'(?:href|src)="(%s[^"]+)"' % re.escape(settings.STATIC_URL))
+HEADERS = {"HTTP_ACCEPT_ENCODING": "br, gzip"}
+
+
+def before_settings():
+    middleware = [m for m in settings.MIDDLEWARE if m != "core.middleware.StaticFilesMiddleware"]
+    return {
+        "MIDDLEWARE": middleware + ["whitenoise.middleware.WhiteNoiseMiddleware"],
+        "STORAGES": {
+            **settings.STORAGES,
+            "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+        },
+    }
+
+
+def body_size(response):
+    if response.streaming:
+        return sum(len(chunk) for chunk in response.streaming_content)
+    return len(response.content)
+
+
+def page_weight(client):
+    page = client.get("/dashboard/")
+    html = body_size(page)
+    first = repeat = html
+    for url in sorted(set(ASSET_RE.findall(page.content.decode()))):
+        response = client.get(url, **HEADERS)
+        size = body_size(response)
+        first += size
+        if "immutable" not in response.get("Cache-Control", ""):
+            repeat += size
+    return first, repeat
+
+
+def static_latency(client, url, count):
+    timings = []
+    for _ in range(count):
+        start = time.perf_counter()
+        body_size(client.get(url, **HEADERS))
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return statistics.mean(timings), timings[int(len(timings) * 0.99)]
+
+
+def run(label, overrides, admin, count):
+    with tempfile.TemporaryDirectory() as static_root, \
+            override_settings(DEBUG=False, STATIC_ROOT=static_root, **overrides):
+        call_command("collectstatic", interactive=False, verbosity=0)
+        client = Client()
+        client.force_login(admin)
+        first, repeat = page_weight(client)
+        css = ASSET_RE.findall(client.get("/dashboard/").content.decode())
+        css = next(url for url in css if url.endswith(".css"))
+        mean, p99 = static_latency(client, css, count)
+    print(f"{label:<7} {first / 1024:10.1f} {repeat / 1024:11.1f} {mean * 1e6:9.0f} {p99 * 1e6:9.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0)
+    admin = User.objects.create(username="bench-admin", is_staff=True)
+
+    print(f"{'':<7} {'first KiB':>10} {'repeat KiB':>11} {'css us':>9} {'css p99':>9}")
+    run("before", before_settings(), admin, args.requests)
+    run("after", {}, admin, args.requests)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+/api/token/refresh/ throughput as the revoked-token table grows.
+
+    python benchmarks/token_refresh.py [--sizes 0,100000,1000000] [--refreshes 2000]
+
+Runs against a throwaway in-memory test database. At each table size it
+rotates one refresh token --refreshes times through the real view, so
+every call does the revocation INSERT against a table of that size.
+"""
+
+import argparse
+import os
+import sys
+import time
+import uuid
+from datetime import timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+from django.utils import timezone  # noqa: E402
+from rest_framework.test import APIRequestFactory  # noqa: E402
+from rest_framework_simplejwt.views import TokenRefreshView  # noqa: E402
+
+from users.models import RevokedToken  # noqa: E402
+from users.tokens import RevocableRefreshToken  # noqa: E402
+
+factory = APIRequestFactory()
+view = TokenRefreshView.as_view()
+
+
+def grow_to(size):
+    existing = RevokedToken.objects.count()
+    expires_at = timezone.now() + timedelta(days=30)
+    for start in range(existing, size, 10000):
+        RevokedToken.objects.bulk_create(
+            RevokedToken(jti=uuid.uuid4().hex, expires_at=expires_at)
+            for _ in range(min(10000, size - start))
+        )
+
+
+def refreshes_per_second(user, count):
+    refresh = str(RevocableRefreshToken.for_user(user))
+    start = time.perf_counter()
+    for _ in range(count):
+        response = view(factory.post("/api/token/refresh/", {"refresh": refresh}))
+        refresh = response.data["refresh"]
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default="0,100000,1000000")
+    parser.add_argument("--refreshes", type=int, default=2000)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0)
+    user = User.objects.create(username="bench", password="!")
+
+    print(f"{'revoked rows':>12} {'refresh/s':>10}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        grow_to(size)
+        rate = refreshes_per_second(user, args.refreshes)
+        print(f"{RevokedToken.objects.count():>12} {rate:10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Memory and latency of /api/users/list/ at growing user counts.
+
+    python benchmarks/user_list.py [--sizes 10000,100000,1000000]
+
+Runs against a throwaway in-memory test database. For each size it
+compares serializing every user in one response (the old unpaginated
+view), fetching one cursor page, and streaming the full export.
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.db.models.signals import post_save  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+from rest_framework.test import APIRequestFactory, force_authenticate  # noqa: E402
+
+from users.serializers import UserSerializer  # noqa: E402
+from users.views import UserListView  # noqa: E402
+
+factory = APIRequestFactory()
+admin = User(id=0, username="bench-admin", is_staff=True)
+
+
+def measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed * 1000, peak / (1024 * 1024)
+
+
+def serialize_all():
+    UserSerializer(User.objects.all(), many=True).data
+
+
+def cursor_page():
+    request = factory.get("/api/users/list/")
+    force_authenticate(request, user=admin)
+    UserListView.as_view()(request).render()
+
+
+def stream_export():
+    request = factory.get("/api/users/list/", {"export": "stream"})
+    force_authenticate(request, user=admin)
+    for _ in UserListView.as_view()(request).streaming_content:
+        pass
+
+
+def grow_to(size):
+    existing = User.objects.count()
+    batch = []
+    for i in range(existing, size):
+        batch.append(User(username=f"user{i}", email=f"user{i}@example.com", password="!"))
+        if len(batch) == 10000:
+            User.objects.bulk_create(batch)
+            batch = []
+    User.objects.bulk_create(batch)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    args = parser.parse_args()
+
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0)
+    # Profiles are irrelevant here and bulk_create skips signals anyway.
+    post_save.receivers.clear()
+
+    print(f"{'users':>9}  {'mode':<14} {'ms':>10} {'peak MiB':>10}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        grow_to(size)
+        for label, fn in (("serialize all", serialize_all),
+                          ("cursor page", cursor_page),
+                          ("stream export", stream_export)):
+            ms, mib = measure(fn)
+            print(f"{size:>9}  {label:<14} {ms:10.1f} {mib:10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Latency of the admin panel user list and search at growing user counts.
+
+    python benchmarks/user_search.py [--sizes 10000,100000,1000000]
+
+Runs against a throwaway in-memory test database. For each size it times
+the old offset Paginator at its last page next to a keyset page at the
+same depth (adminpanel.search.page_before), then prefix and word searches
+matching few, many and no users, a role filter and a date range.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.core.paginator import Paginator  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.db.models.signals import post_save  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from adminpanel.search import WORDS, cursor_for, find_users, page_before  # noqa: E402
+
+PAGE = 10
+NAMES = ["alice", "bob", "carol", "dave", "erin", "frank", "grace", "heidi", "ivan", "judy",
+         "mallory", "niaj", "olivia", "peggy", "rupert", "sybil", "trent", "victor", "walter"]
+DOMAINS = ["example.com", "mail.com", "corp.io", "school.edu"]
+START = timezone.now() - timedelta(days=3 * 365)
+
+
+def grow_to(size, rng):
+    existing = User.objects.count()
+    batch = []
+    for i in range(existing, size):
+        first, last = rng.choice(NAMES), rng.choice(NAMES)
+        batch.append(User(
+            username=f"{first}{last}{i}", email=f"{first}.{last}{i}@{rng.choice(DOMAINS)}",
+            password="!", is_staff=rng.random() < 0.02, is_superuser=rng.random() < 0.001,
+            date_joined=START + timedelta(seconds=i * 60),
+        ))
+        if len(batch) == 10000:
+            User.objects.bulk_create(batch)
+            batch = []
+    User.objects.bulk_create(batch)
+
+
+def timed(fn, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def offset_last_page():
+    paginator = Paginator(User.objects.order_by("-date_joined"), PAGE)
+    list(paginator.get_page(paginator.num_pages))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    args = parser.parse_args()
+
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0)
+    # Profiles are irrelevant here and bulk_create skips signals anyway.
+    post_save.receivers.clear()
+    rng = random.Random(0)
+
+    print(f"{'users':>9}  {'query':<26} {'ms':>8}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        grow_to(size, rng)
+        users = find_users()
+        deepest, halfway = users[size - PAGE - 1], users[size // 2]
+        middle = START + timedelta(seconds=size * 30)
+        cases = [
+            ("offset, last page", offset_last_page),
+            ("keyset, last page", lambda: page_before(users, cursor_for(deepest), PAGE)),
+            ("prefix 'peggyrup'", lambda: page_before(find_users("peggyrup"), "", PAGE)),
+            ("prefix 'sybil.tr'", lambda: page_before(find_users("sybil.tr"), "", PAGE)),
+            ("prefix 'a'", lambda: page_before(find_users("a"), "", PAGE)),
+            ("prefix 'zz'", lambda: page_before(find_users("zz"), "", PAGE)),
+            ("words 'trent school'", lambda: page_before(
+                find_users("trent school", WORDS), "", PAGE)),
+            ("words 'peggy edu'", lambda: page_before(
+                find_users("peggy edu", WORDS, role="admin"), "", PAGE)),
+            ("words 'zzz'", lambda: page_before(find_users("zzz", WORDS), "", PAGE)),
+            ("role admin, halfway", lambda: page_before(
+                find_users(role="admin"), cursor_for(halfway), PAGE)),
+            ("role regular, 2 days", lambda: page_before(find_users(
+                role="regular", joined_from=middle.date().isoformat(),
+                joined_to=(middle + timedelta(days=1)).date().isoformat(),
+            ), "", PAGE)),
+        ]
+        for label, fn in cases:
+            print(f"{size:>9}  {label:<26} {timed(fn):8.2f}")
+
+
+if __name__ == "__main__":
+    main()
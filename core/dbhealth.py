@@ -0,0 +1,96 @@
+"""
+Cloud database health probe used by settings to pick the default database.
+
+The result of a probe is written to a small state file so that gunicorn
+workers, management commands and test runs started shortly after reuse it
+instead of opening a MySQL connection on every boot.
+"""
+
+import json
+import os
+import tempfile
+import time
+
+
+def read_state(state_file, ttl):
+    """
+    Returns the cached probe result, or None if it is missing or older than ttl.
+    """
+    try:
+        with open(state_file) as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if time.time() - state.get("checked_at", 0) > ttl:
+        return None
+    return state
+
+
+def write_state(state_file, state):
+    """
+    Atomically replaces the state file so concurrent readers never see half a file.
+    """
+    directory = os.path.dirname(state_file) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, state_file)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def probe(db, timeout):
+    """
+    Opens and closes one connection to the MySQL database described by db.
+
+    Returns None on success or the error message on failure. Every socket
+    operation is bounded by timeout, including the server handshake.
+    """
+    if not db.get("HOST"):
+        return "DB_HOST is not set"
+
+    try:
+        import MySQLdb
+        conn = MySQLdb.connect(
+            host=db['HOST'],
+            user=db['USER'],
+            passwd=db['PASSWORD'],
+            db=db['NAME'],
+            port=int(db['PORT']),
+            connect_timeout=timeout,
+            read_timeout=timeout,
+            write_timeout=timeout,
+        )
+        conn.close()
+    except Exception as e:
+        return str(e)
+    return None
+
+
+def cloud_is_healthy(db, state_file, timeout, ttl):
+    """
+    Returns True if the cloud database should be used.
+
+    A fresh state file answers immediately; otherwise the database is probed
+    and the outcome recorded for the next ttl seconds.
+    """
+    state = read_state(state_file, ttl)
+    if state is not None:
+        return state["healthy"]
+
+    error = probe(db, timeout)
+    if error is None:
+        print("Using cloud MySQL database.")
+    else:
+        print("Cloud database connection failed, using local SQLite. Error:", error)
+
+    write_state(state_file, {
+        "healthy": error is None,
+        "error": error,
+        "checked_at": time.time(),
+    })
+    return error is None
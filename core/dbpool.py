@@ -0,0 +1,209 @@
+"""
+A small thread-safe connection pool shared by the threads of one process.
+
+The pool is driver-agnostic: it is given a ``connect`` callable that opens a
+new DB-API connection and an optional ``ping`` callable used as a health
+check before an idle connection is handed out again. The counters of
+every pool in the process are exported on /metrics.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+
+from core import metrics
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection became available within the pool timeout."""
+
+
+class ConnectionPool:
+    def __init__(self, connect, max_size=10, timeout=10.0, recycle=3600, ping=None):
+        self.connect = connect
+        self.max_size = max_size
+        self.timeout = timeout
+        self.recycle = recycle
+        self.ping = ping
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.max_size)
+        # LIFO so the most recently used (and warmest) connection goes out first
+        self._idle = deque()
+        self._created = {}
+        self.hits = 0
+        self.misses = 0
+        self.waits = 0
+        self.wait_time = 0.0
+        self.recycled = 0
+        self.failed_checks = 0
+
+    def _check_fork(self):
+        # Connections must never be shared between a gunicorn master and its
+        # forked workers; a child starts with an empty pool.
+        if self._pid != os.getpid():
+            self._reset()
+
+    def acquire(self):
+        """
+        Returns an open connection, reusing an idle one when possible.
+        """
+        self._check_fork()
+
+        if not self._slots.acquire(blocking=False):
+            start = time.perf_counter()
+            acquired = self._slots.acquire(timeout=self.timeout)
+            waited = time.perf_counter() - start
+            with self._lock:
+                self.waits += 1
+                self.wait_time += waited
+            if not acquired:
+                raise PoolTimeout(
+                    "No database connection available after %.1fs (pool size %d)."
+                    % (waited, self.max_size)
+                )
+
+        try:
+            while True:
+                with self._lock:
+                    if not self._idle:
+                        break
+                    conn = self._idle.pop()
+
+                if self.recycle and time.monotonic() - self._created[id(conn)] > self.recycle:
+                    with self._lock:
+                        self.recycled += 1
+                    self._discard(conn)
+                    continue
+
+                if self.ping is not None and not self._is_healthy(conn):
+                    with self._lock:
+                        self.failed_checks += 1
+                    self._discard(conn)
+                    continue
+
+                with self._lock:
+                    self.hits += 1
+                return conn
+
+            conn = self.connect()
+            with self._lock:
+                self.misses += 1
+                self._created[id(conn)] = time.monotonic()
+            return conn
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, conn, discard=False):
+        """
+        Returns a connection to the pool, or closes it if discard is True.
+        """
+        if self._pid != os.getpid() or id(conn) not in self._created:
+            # Checked out before a fork or never ours; just close it.
+            self._close(conn)
+            return
+
+        try:
+            if discard:
+                self._discard(conn)
+            else:
+                with self._lock:
+                    self._idle.append(conn)
+        finally:
+            self._slots.release()
+
+    def close_all(self):
+        """
+        Closes every idle connection. Checked-out connections are left alone.
+        """
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for conn in idle:
+            self._discard(conn)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "max_size": self.max_size,
+                "idle": len(self._idle),
+                "open": len(self._created),
+                "hits": self.hits,
+                "misses": self.misses,
+                "waits": self.waits,
+                "wait_time": round(self.wait_time, 6),
+                "recycled": self.recycled,
+                "failed_checks": self.failed_checks,
+            }
+
+    def _is_healthy(self, conn):
+        try:
+            self.ping(conn)
+        except Exception:
+            return False
+        return True
+
+    def _discard(self, conn):
+        with self._lock:
+            self._created.pop(id(conn), None)
+        self._close(conn)
+
+    @staticmethod
+    def _close(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, connect, **options):
+    """
+    Returns the process-wide pool for a database alias, creating it on first use.
+    """
+    with _pools_lock:
+        pool = _pools.get(alias)
+        if pool is None:
+            pool = _pools[alias] = ConnectionPool(connect, **options)
+        return pool
+
+
+def pool_stats():
+    """
+    Returns the counters of every pool in this process, keyed by alias.
+    """
+    with _pools_lock:
+        # Pools inherited from the master hold its counters until first used
+        pools = {alias: pool for alias, pool in _pools.items() if pool._pid == os.getpid()}
+    return {alias: pool.stats() for alias, pool in pools.items()}
+
+
+@metrics.register_collector
+def pool_metrics():
+    samples = []
+    for alias, stats in pool_stats().items():
+        samples += [
+            ("smartcalc_db_pool_checkouts_total", {"database": alias, "connection": "reused"},
+             stats["hits"]),
+            ("smartcalc_db_pool_checkouts_total", {"database": alias, "connection": "opened"},
+             stats["misses"]),
+            ("smartcalc_db_pool_waits_total", {"database": alias}, stats["waits"]),
+            ("smartcalc_db_pool_wait_seconds_total", {"database": alias}, stats["wait_time"]),
+            ("smartcalc_db_pool_discarded_total", {"database": alias, "reason": "recycled"},
+             stats["recycled"]),
+            ("smartcalc_db_pool_discarded_total", {"database": alias, "reason": "failed_check"},
+             stats["failed_checks"]),
+            ("smartcalc_db_pool_connections", {"database": alias, "state": "idle"},
+             stats["idle"]),
+            ("smartcalc_db_pool_connections", {"database": alias, "state": "in_use"},
+             stats["open"] - stats["idle"]),
+            ("smartcalc_db_pool_size", {"database": alias}, stats["max_size"]),
+        ]
+    return samples
@@ -0,0 +1,70 @@
+"""
+The shared file cache, with counters every gunicorn worker can update.
+
+Django's FileBasedCache implements add() as has_key() then set(), and
+incr() as get() then set(), so two workers counting at the same moment
+both write the same value; incr() also resets the entry to the default
+timeout. Here add() and incr() hold an flock() on one lock file in the
+cache directory, and incr() keeps the entry's expiry. The counters in
+users.throttling rely on this.
+"""
+
+import os
+import pickle
+import tempfile
+import time
+import zlib
+from contextlib import contextmanager
+
+from asgiref.sync import sync_to_async
+from django.core.cache.backends import filebased
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.files import locks
+
+
+class FileBasedCache(filebased.FileBasedCache):
+    # Not a cache_suffix file, so culling and clear() leave it alone
+    lock_name = "counters.lock"
+
+    @contextmanager
+    def _locked(self):
+        self._createdir()
+        with open(os.path.join(self._dir, self.lock_name), "ab") as lock:
+            locks.lock(lock, locks.LOCK_EX)
+            try:
+                yield
+            finally:
+                locks.unlock(lock)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        with self._locked():
+            return super().add(key, value, timeout, version)
+
+    def incr(self, key, delta=1, version=None):
+        fname = self._key_to_file(key, version)
+        with self._locked():
+            try:
+                with open(fname, "rb") as f:
+                    expiry = pickle.load(f)
+                    value = pickle.loads(zlib.decompress(f.read()))
+            except (FileNotFoundError, EOFError):
+                expiry, value = 0, None
+            if expiry is not None and expiry < time.time():
+                raise ValueError("Key '%s' not found" % key)
+
+            value += delta
+            # Replaced rather than rewritten in place, as set() does, so that
+            # unlocked readers never see a half-written file
+            fd, tmp_path = tempfile.mkstemp(dir=self._dir)
+            try:
+                with open(fd, "wb") as f:
+                    f.write(pickle.dumps(expiry, self.pickle_protocol))
+                    f.write(zlib.compress(pickle.dumps(value, self.pickle_protocol)))
+                os.replace(tmp_path, fname)
+            except BaseException:
+                os.remove(tmp_path)
+                raise
+            return value
+
+    async def aincr(self, key, delta=1, version=None):
+        return await sync_to_async(self.incr)(key, delta, version)
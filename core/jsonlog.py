@@ -0,0 +1,234 @@
+"""
+Non-blocking JSONL logging that every gunicorn worker can share.
+
+LOGGING points its handlers at QueuedJSONLHandler. Its emit() only puts
+the record on a bounded per-process queue, and a QueueListener thread
+writes it out. When the queue is full the record is dropped and counted
+(smartcalc_log_records_dropped_total) rather than blocking the request.
+
+The listener writes through SharedJSONLFileHandler. Each record becomes
+one JSON line, written with a single O_APPEND write(), so lines from
+concurrent workers never interleave. Before each write the handler
+stat()s the path:
+  - if another worker has rotated the file, it reopens it;
+  - if the file would outgrow max_bytes, or was last written in an earlier
+    rotate_seconds period (UTC), it rotates the file itself. An flock()
+    makes sure exactly one worker renames it.
+Each rotation gzips the earlier rotated files once nobody can still be
+appending to them, and keeps only the newest backup_count.
+core.logcat streams and filters the current and rotated files.
+"""
+
+import copy
+import glob
+import gzip
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import shutil
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: one process, nothing to coordinate with
+    fcntl = None
+
+# A worker stat()s the file before every write, so a renamed file can only
+# receive records that were already being written; this is plenty.
+COMPRESS_DELAY = 5.0
+
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+_JSON_TYPES = (str, int, float, bool, type(None), list, dict)
+
+
+def rotated_files(filename):
+    """
+    Rotated copies of filename, oldest first (by the time in their names).
+    """
+    return sorted(
+        path for path in glob.glob(glob.escape(filename) + ".*")
+        if not path.endswith((".lock", ".tmp"))
+    )
+
+
+class JSONLFormatter(logging.Formatter):
+    """
+    One JSON object per record: ts, level, logger, pid, then either the
+    keys of a dict message or "message", any extra= fields, and "exc".
+    """
+
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "pid": record.process,
+        }
+        if isinstance(record.msg, dict):
+            entry.update(record.msg)
+        else:
+            entry["message"] = record.getMessage()
+        entry.update((k, v) for k, v in vars(record).items() if k not in _RECORD_ATTRS)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class SharedJSONLFileHandler(logging.Handler):
+    def __init__(self, filename, max_bytes=0, rotate_seconds=0, backup_count=5):
+        super().__init__()
+        self.filename = os.path.abspath(filename)
+        self.max_bytes = max_bytes
+        self.rotate_seconds = rotate_seconds
+        self.backup_count = backup_count
+        self.fd = None
+        self.inode = None
+        self.setFormatter(JSONLFormatter())
+
+    def emit(self, record):
+        try:
+            line = (self.format(record) + "\n").encode("utf-8")
+            os.write(self._file_for(len(line)), line)
+        except Exception:
+            self.handleError(record)
+
+    def close(self):
+        with self.lock:
+            if self.fd is not None:
+                os.close(self.fd)
+                self.fd = None
+        super().close()
+
+    def _stat(self):
+        try:
+            return os.stat(self.filename)
+        except FileNotFoundError:
+            return None
+
+    def _due(self, st, incoming):
+        if st.st_size == 0:
+            return False
+        if self.max_bytes and st.st_size + incoming > self.max_bytes:
+            return True
+        return bool(
+            self.rotate_seconds
+            and st.st_mtime // self.rotate_seconds != time.time() // self.rotate_seconds
+        )
+
+    def _file_for(self, incoming):
+        st = self._stat()
+        if st is not None and self._due(st, incoming):
+            self._rotate(incoming)
+            st = self._stat()
+        if self.fd is None or st is None or st.st_ino != self.inode:
+            if self.fd is not None:
+                os.close(self.fd)
+            os.makedirs(os.path.dirname(self.filename), exist_ok=True)
+            self.fd = os.open(self.filename, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            self.inode = os.fstat(self.fd).st_ino
+        return self.fd
+
+    def _rotate(self, incoming):
+        with open(self.filename + ".lock", "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            st = self._stat()
+            # Another worker may have rotated it while this one waited
+            if st is None or not self._due(st, incoming):
+                return
+            # Names sort in rotation order, however many rotations share a
+            # second; the inode only keeps them unique
+            seconds, nanoseconds = divmod(time.time_ns(), 10 ** 9)
+            stamp = time.strftime("%Y%m%d-%H%M%S", time.gmtime(seconds))
+            os.rename(
+                self.filename,
+                "%s.%s.%09d-%d" % (self.filename, stamp, nanoseconds, st.st_ino),
+            )
+            self._compress_and_prune()
+
+    def _compress_and_prune(self):
+        for path in rotated_files(self.filename):
+            if path.endswith(".gz") or time.time() - os.path.getmtime(path) < COMPRESS_DELAY:
+                continue
+            with open(path, "rb") as source, gzip.open(path + ".gz.tmp", "wb") as target:
+                shutil.copyfileobj(source, target)
+            os.replace(path + ".gz.tmp", path + ".gz")
+            os.remove(path)
+
+        backups = rotated_files(self.filename)
+        for path in backups[:max(0, len(backups) - self.backup_count)]:
+            os.remove(path)
+
+
+class _Listener(logging.handlers.QueueListener):
+    def enqueue_sentinel(self):
+        # Blocks rather than failing when the queue is full at shutdown
+        self.queue.put(self._sentinel)
+
+
+class QueuedJSONLHandler(logging.handlers.QueueHandler):
+    """
+    Queues records for a SharedJSONLFileHandler on a listener thread,
+    started in each process on its first record.
+    """
+
+    def __init__(self, filename, max_bytes=0, rotate_seconds=0, backup_count=5, queue_size=10000):
+        super().__init__(queue.Queue(queue_size))
+        self.queue_size = queue_size
+        self.target = SharedJSONLFileHandler(filename, max_bytes, rotate_seconds, backup_count)
+        self.listener = None
+        self._pid = None
+
+    def _start(self):
+        # A forked worker neither has the parent's thread nor wants its queue
+        self.queue = queue.Queue(self.queue_size)
+        self.listener = _Listener(self.queue, self.target, respect_handler_level=True)
+        self.listener.start()
+        self._pid = os.getpid()
+
+    def prepare(self, record):
+        """
+        Resolves everything that depends on the caller (message arguments,
+        the traceback, arbitrary extra= objects) in the caller's thread;
+        the JSON is built on the listener thread.
+        """
+        record = copy.copy(record)
+        if not isinstance(record.msg, dict):
+            record.msg = record.getMessage()
+            record.args = None
+        if record.exc_info:
+            record.exc_text = self.target.formatter.formatException(record.exc_info)
+            record.exc_info = None
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not isinstance(value, _JSON_TYPES):
+                setattr(record, key, str(value))
+        return record
+
+    def emit(self, record):
+        try:
+            if self._pid != os.getpid():
+                self._start()
+            self.queue.put_nowait(self.prepare(record))
+        except queue.Full:
+            # Imported here so that core.logcat runs without Django settings
+            from . import metrics
+            metrics.inc(
+                "smartcalc_log_records_dropped_total",
+                {"file": os.path.basename(self.target.filename)},
+            )
+        except Exception:
+            self.handleError(record)
+
+    def close(self):
+        # logging.shutdown() calls this at exit: write out what is queued
+        with self.lock:
+            if self.listener is not None and self._pid == os.getpid():
+                self.listener.stop()
+            self.listener = None
+            self._pid = None
+        self.target.close()
+        super().close()
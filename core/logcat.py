@@ -0,0 +1,184 @@
+"""
+Streams and filters JSON log records across a log file and its rotations.
+
+    python -m core.logcat [requests|errors|PATH] [--since 2h] [--until TIME]
+        [--level WARNING] [--status 5xx] [--path /api/] [--view NAME]
+        [--min-ms 500] [--grep TEXT] [--where KEY=VALUE ...] [--count] [-f]
+
+Reads the rotated copies oldest first, then the current file, one line at
+a time (gzipped copies through gzip), so memory use does not grow with the
+files. Rotated files last written before --since are not opened at all.
+Matching lines are printed unchanged, ready for jq. TIME is an ISO date
+or time, or an age such as 90s, 15m, 2h or 7d. -f keeps following the
+current file across rotations.
+"""
+
+import argparse
+import gzip
+import json
+import os
+import re
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+from .jsonlog import rotated_files
+
+LOG_DIR = Path(__file__).resolve().parent.parent / "logs"
+NAMES = {"requests": "requests.jsonl", "errors": "errors.jsonl"}
+UNITS = {"s": 1, "m": 60, "h": 60 * 60, "d": 24 * 60 * 60}
+LEVELS = ["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"]
+
+
+def parse_time(value):
+    match = re.fullmatch(r"(\d+)([smhd])", value)
+    if match:
+        return time.time() - int(match.group(1)) * UNITS[match.group(2)]
+    return datetime.fromisoformat(value).timestamp()
+
+
+def status_filter(spec):
+    """
+    "500", "5xx" or a comma-separated mix of both.
+    """
+    exact, prefixes = set(), []
+    for part in spec.split(","):
+        part = part.strip().lower()
+        if part.endswith("xx"):
+            prefixes.append(part[:-2])
+        elif part:
+            exact.add(part)
+
+    def matches(status):
+        status = str(status)
+        return status in exact or any(status.startswith(prefix) for prefix in prefixes)
+    return matches
+
+
+def build_filters(args):
+    filters = []
+    if args.since is not None:
+        since = parse_time(args.since)
+        filters.append(lambda r: r.get("ts", 0) >= since)
+    if args.until is not None:
+        until = parse_time(args.until)
+        filters.append(lambda r: r.get("ts", 0) < until)
+    if args.level:
+        minimum = LEVELS.index(args.level.upper())
+        filters.append(lambda r: r.get("level") in LEVELS[minimum:])
+    if args.status:
+        matches = status_filter(args.status)
+        filters.append(lambda r: matches(r.get("status", "")))
+    if args.path:
+        filters.append(lambda r: str(r.get("path", "")).startswith(args.path))
+    if args.view:
+        filters.append(lambda r: r.get("view") == args.view)
+    if args.min_ms is not None:
+        filters.append(lambda r: (r.get("duration_ms") or 0) >= args.min_ms)
+    for condition in args.where:
+        key, _, value = condition.partition("=")
+        filters.append(lambda r, key=key, value=value: str(r.get(key)) == value)
+    return filters
+
+
+def open_log(path):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", errors="replace")
+    return open(path, encoding="utf-8", errors="replace")
+
+
+def log_files(filename, since):
+    for path in rotated_files(filename):
+        if since is not None and os.path.getmtime(path) < since:
+            continue
+        yield path
+    if os.path.exists(filename):
+        yield filename
+
+
+def follow(f, filename):
+    """
+    Yields lines appended to f, switching to the new file after a rotation.
+
+    A line is only yielded once its newline has been written. The rotated
+    file is read to the end before the switch, since the writer may have
+    added to it after the last read.
+    """
+    partial = ""
+    while True:
+        line = f.readline()
+        if line.endswith("\n"):
+            yield partial + line
+            partial = ""
+            continue
+        partial += line
+        time.sleep(0.5)
+        try:
+            rotated = os.stat(filename).st_ino != os.fstat(f.fileno()).st_ino
+        except FileNotFoundError:
+            continue
+        if rotated:
+            rest = partial + f.read()
+            f.close()
+            yield from rest.splitlines(keepends=True)
+            partial = ""
+            f = open_log(filename)
+
+
+def lines(filename, since, keep_following):
+    for path in log_files(filename, since):
+        if keep_following and path == filename:
+            yield from follow(open_log(path), filename)
+        with open_log(path) as f:
+            yield from f
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m core.logcat", description=__doc__.splitlines()[1],
+    )
+    parser.add_argument("log", nargs="?", default="requests",
+                        help="requests, errors or the path of a log file")
+    parser.add_argument("--since")
+    parser.add_argument("--until")
+    parser.add_argument("--level", choices=LEVELS + [l.lower() for l in LEVELS],
+                        help="this level and above")
+    parser.add_argument("--status", help="e.g. 500, 5xx or 404,5xx")
+    parser.add_argument("--path", help="request path prefix")
+    parser.add_argument("--view", help="URL name")
+    parser.add_argument("--min-ms", type=float, help="slowest requests only")
+    parser.add_argument("--grep", help="substring of the raw line")
+    parser.add_argument("--where", action="append", default=[], metavar="KEY=VALUE")
+    parser.add_argument("--count", action="store_true", help="print the number of matches")
+    parser.add_argument("-f", "--follow", action="store_true")
+    args = parser.parse_args(argv)
+
+    filename = str(LOG_DIR / NAMES[args.log]) if args.log in NAMES else os.path.abspath(args.log)
+    filters = build_filters(args)
+    since = parse_time(args.since) if args.since is not None else None
+
+    count = 0
+    try:
+        for line in lines(filename, since, args.follow and not args.count):
+            # The substring test is cheap and skips most lines before any parsing
+            if args.grep and args.grep not in line:
+                continue
+            if filters:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if not all(f(record) for f in filters):
+                    continue
+            count += 1
+            if not args.count:
+                sys.stdout.write(line)
+    except (BrokenPipeError, KeyboardInterrupt):
+        return
+    if args.count:
+        print(count)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Read the end of a log file without loading the whole file.
+
+The JSON-lines logs (core.jsonlog) hold one record per line, so the last
+records are the last lines. Files are read backwards from EOF in
+fixed-size blocks, and results are cached per file by (inode, size,
+mtime) so repeated calls on an unchanged file do no I/O beyond a stat().
+"""
+
+import os
+import threading
+
+BLOCK_SIZE = 4096
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def _signature(path):
+    st = os.stat(path)
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+def _cached(path, key, compute):
+    try:
+        signature = _signature(path)
+    except OSError:
+        return []
+
+    with _cache_lock:
+        entry = _cache.get((path, key))
+    if entry is not None and entry[0] == signature:
+        return entry[1]
+
+    try:
+        result = compute(path, signature[1])
+    except OSError:
+        return []
+
+    with _cache_lock:
+        _cache[(path, key)] = (signature, result)
+    return result
+
+
+def _read_backwards(path, size, done):
+    """
+    Returns the file's lines (bytes, without newline) from last to first.
+
+    done(line) is called for every line read and stops the scan when true.
+    """
+    lines = []
+    with open(path, "rb") as f:
+        position = size
+        remainder = b""
+        while position > 0:
+            read_size = min(BLOCK_SIZE, position)
+            position -= read_size
+            f.seek(position)
+            chunk = f.read(read_size) + remainder
+            parts = chunk.split(b"\n")
+            # The first part may be cut in the middle of a line.
+            remainder = parts.pop(0)
+            for line in reversed(parts):
+                lines.append(line)
+                if done(line):
+                    return lines
+        lines.append(remainder)
+    return lines
+
+
+def _decode(line):
+    return line.decode("utf-8", errors="replace").rstrip("\r")
+
+
+def tail_lines(path, n=1):
+    """
+    Returns the last n non-empty lines of a file, oldest first.
+    """
+    def compute(path, size):
+        seen = []
+
+        def done(line):
+            if line.strip():
+                seen.append(line)
+            return len(seen) >= n
+
+        lines = _read_backwards(path, size, done)
+        found = [_decode(l) for l in lines if l.strip()][:n]
+        return list(reversed(found))
+
+    return _cached(path, ("lines", n), compute)
+
@@ -0,0 +1,284 @@
+"""
+Prometheus-style counters and histograms shared across gunicorn workers.
+
+Each process keeps its metrics in memory. From its first metric on, a
+background thread writes a snapshot to METRICS_DIR/<pid>-<nonce>.json
+every METRICS_FLUSH_INTERVAL seconds when it changed, and once more at
+exit; the nonce keeps a new process that reuses a PID from overwriting a
+dead one's file. The /metrics view sums its own live values with the snapshots
+of every other process, so scraping never touches the database and
+counters from restarted workers are not lost. gunicorn.conf.py empties
+METRICS_DIR when the master starts.
+
+Numbers another module already keeps, such as the hashing executor's
+stats(), are read into each snapshot by a function passed to
+register_collector(). Gauges among them only count while their process
+is alive.
+"""
+
+import atexit
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+
+from django.conf import settings
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# name: (type, help)
+METRICS = {
+    "smartcalc_logins_total": (
+        "counter", "Login attempts on /api/login/ by result."),
+    "smartcalc_login_throttled_total": (
+        "counter", "Login attempts rejected by the throttle, by limit and where the block was found."),
+    "smartcalc_token_refreshes_total": (
+        "counter", "Refresh token rotations by result."),
+    "smartcalc_announcement_fetches_total": (
+        "counter", "GET requests for the active announcement."),
+    "smartcalc_announcement_waits_total": (
+        "counter", "Announcement long-polls answered, by whether it changed."),
+    "smartcalc_announcement_cache_total": (
+        "counter", "Active announcement cache lookups by layer that answered."),
+    "smartcalc_users_created_total": (
+        "counter", "Users created, by source."),
+    "smartcalc_audit_events_total": (
+        "counter", "Audit events by how they were written."),
+    "smartcalc_log_records_dropped_total": (
+        "counter", "Log records dropped because the logging queue was full, by file."),
+    "smartcalc_request_duration_seconds": (
+        "histogram", "Request latency by URL name."),
+    "smartcalc_password_hashes_total": (
+        "counter", "Password hashes on the hashing executor by result; timed out hashes still complete."),
+    "smartcalc_password_hash_seconds_total": (
+        "counter", "Seconds password hashes spent on the hashing executor, by phase."),
+    "smartcalc_password_hashes_in_flight": (
+        "gauge", "Password hashes queued or running on the hashing executor."),
+    "smartcalc_password_hash_workers": (
+        "gauge", "Hashing executor threads, by whether batch jobs may use them."),
+    "smartcalc_db_pool_checkouts_total": (
+        "counter", "Connections handed out by the database pool, by whether one was reused or opened."),
+    "smartcalc_db_pool_waits_total": (
+        "counter", "Checkouts that waited for a free pool slot."),
+    "smartcalc_db_pool_wait_seconds_total": (
+        "counter", "Seconds spent waiting for a free pool slot."),
+    "smartcalc_db_pool_discarded_total": (
+        "counter", "Idle pooled connections closed instead of reused, by reason."),
+    "smartcalc_db_pool_connections": (
+        "gauge", "Open pooled connections by state."),
+    "smartcalc_db_pool_size": (
+        "gauge", "Most connections each process's pool may open."),
+}
+
+
+def _key(name, labels):
+    return (name, tuple(sorted((labels or {}).items())))
+
+
+_collectors = []
+
+
+def register_collector(fn):
+    """
+    Adds fn() to every snapshot: it returns (name, labels, value) samples
+    of counters or gauges listed in METRICS.
+    """
+    _collectors.append(fn)
+    return fn
+
+
+def _collected():
+    samples = []
+    for fn in _collectors:
+        for name, labels, value in fn():
+            samples.append([name, dict(labels or {}), value])
+    return samples
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        pass
+    return True
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._nonce = uuid.uuid4().hex[:12]
+        self._counters = {}
+        self._histograms = {}
+        self._flusher = None
+        self._written = None
+
+    def _check_fork(self):
+        # A forked worker must not report the master's numbers as its own,
+        # and does not inherit the master's flush thread.
+        if self._pid != os.getpid():
+            self._reset()
+
+    def _start_flusher(self):
+        if self._flusher is None:
+            self._flusher = threading.Thread(
+                target=self._flush_every_interval, name="metrics-flush", daemon=True
+            )
+            self._flusher.start()
+
+    def inc(self, name, labels=None, amount=1):
+        key = _key(name, labels)
+        with self._lock:
+            self._check_fork()
+            self._start_flusher()
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, value, labels=None):
+        key = _key(name, labels)
+        with self._lock:
+            self._check_fork()
+            self._start_flusher()
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = [[0] * len(LATENCY_BUCKETS), 0.0, 0]
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if value <= bound:
+                    hist[0][i] += 1
+                    break
+            hist[1] += value
+            hist[2] += 1
+
+    def snapshot(self):
+        collected = _collected()
+        with self._lock:
+            self._check_fork()
+            return {
+                "pid": os.getpid(),
+                "collected": collected,
+                "counters": [[n, dict(l), v] for (n, l), v in self._counters.items()],
+                "histograms": [
+                    [n, dict(l), list(h[0]), h[1], h[2]]
+                    for (n, l), h in self._histograms.items()
+                ],
+            }
+
+    def path(self):
+        return os.path.join(settings.METRICS_DIR, "%d-%s.json" % (self._pid, self._nonce))
+
+    def _flush_every_interval(self):
+        # Collected numbers change without inc() or observe(), so the
+        # snapshot is compared rather than waiting for the next metric.
+        while True:
+            time.sleep(settings.METRICS_FLUSH_INTERVAL)
+            self.flush()
+
+    def flush(self):
+        if not settings.configured:
+            # Imported outside Django (benchmarks/dbpool.py); nowhere to write
+            return
+        data = json.dumps(self.snapshot())
+        if data == self._written:
+            return
+        try:
+            os.makedirs(settings.METRICS_DIR, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=settings.METRICS_DIR, suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                f.write(data)
+            os.replace(tmp_path, self.path())
+        except OSError:
+            return
+        self._written = data
+
+
+registry = Registry()
+inc = registry.inc
+observe = registry.observe
+atexit.register(registry.flush)
+
+
+def collect():
+    """
+    Returns the metrics of all processes merged into one snapshot.
+    """
+    snapshots = [registry.snapshot()]
+    own = os.path.basename(registry.path())
+    try:
+        names = os.listdir(settings.METRICS_DIR)
+    except OSError:
+        names = []
+    for name in names:
+        if not name.endswith(".json") or name == own:
+            continue
+        try:
+            with open(os.path.join(settings.METRICS_DIR, name)) as f:
+                snapshots.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+
+    counters, gauges, histograms = {}, {}, {}
+    for snapshot in snapshots:
+        for name, labels, value in snapshot["counters"]:
+            key = _key(name, labels)
+            counters[key] = counters.get(key, 0) + value
+        live = snapshot is snapshots[0] or _alive(snapshot["pid"])
+        for name, labels, value in snapshot["collected"]:
+            kind = METRICS[name][0]
+            if kind == "gauge" and not live:
+                continue
+            merged = gauges if kind == "gauge" else counters
+            key = _key(name, labels)
+            merged[key] = merged.get(key, 0) + value
+        for name, labels, buckets, total, count in snapshot["histograms"]:
+            key = _key(name, labels)
+            merged = histograms.setdefault(key, [[0] * len(LATENCY_BUCKETS), 0.0, 0])
+            merged[0] = [a + b for a, b in zip(merged[0], buckets)]
+            merged[1] += total
+            merged[2] += count
+    return counters, gauges, histograms
+
+
+def _labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (
+        (k, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for k, v in pairs
+    )
+    return "{%s}" % ",".join('%s="%s"' % pair for pair in escaped)
+
+
+def render():
+    """
+    Returns all metrics in the Prometheus text exposition format.
+    """
+    counters, gauges, histograms = collect()
+    lines = []
+    for name, (kind, help_text) in METRICS.items():
+        lines.append("# HELP %s %s" % (name, help_text))
+        lines.append("# TYPE %s %s" % (name, kind))
+        if kind != "histogram":
+            values = gauges if kind == "gauge" else counters
+            for (n, labels), value in sorted(values.items()):
+                if n == name:
+                    lines.append("%s%s %s" % (name, _labels(labels), value))
+            continue
+
+        for (n, labels), (buckets, total, count) in sorted(histograms.items()):
+            if n != name:
+                continue
+            cumulative = 0
+            for bound, bucket in zip(LATENCY_BUCKETS, buckets):
+                cumulative += bucket
+                lines.append("%s_bucket%s %d" % (name, _labels(labels, [("le", bound)]), cumulative))
+            lines.append("%s_bucket%s %d" % (name, _labels(labels, [("le", "+Inf")]), count))
+            lines.append("%s_sum%s %s" % (name, _labels(labels), total))
+            lines.append("%s_count%s %d" % (name, _labels(labels), count))
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,251 @@
+"""
+Per-request performance instrumentation.
+
+PerformanceMiddleware measures every request's total latency, the number
+and duration of database queries, DRF/template render time and response
+size. The numbers go out as a Server-Timing header (PERF_SERVER_TIMING)
+and as one JSON line per request in REQUEST_LOG_FILE, through the
+"performance" logger, sampled by PERF_LOG_SAMPLE_RATE. Requests issuing
+more than PERF_QUERY_WARN_THRESHOLD queries are logged at WARNING to
+catch N+1 regressions.
+
+PERF_PROFILE_SAMPLE_RATE > 0 additionally runs cProfile on that fraction
+of requests and writes the stats to PERF_PROFILE_DIR.
+
+Both middlewares here also run natively under ASGI, so async views are
+not pushed onto a thread. Async requests count queries through a context
+variable, since their queries run on the async ORM's worker thread, and
+are never profiled, since cProfile would mix up interleaved requests.
+
+Render time covers DRF Responses and TemplateResponses, which render after
+process_template_response(), and templates rendered inside the view, such
+as by the render() shortcut. The latter are only seen when they come from
+the core.templating backend, which reports to the request's RenderTimer.
+"""
+
+import cProfile
+import logging
+import os
+import random
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from . import metrics as metrics_registry
+
+logger = logging.getLogger("performance")
+
+
+class QueryCounter:
+    """
+    A connection.execute_wrapper() that counts queries and their time.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - start
+
+
+class RenderTimer:
+    """
+    Time spent rendering templates in the view, before the response is
+    returned.
+    """
+
+    def __init__(self):
+        self.duration = 0.0
+
+
+_async_queries = ContextVar("perf_async_queries", default=None)
+render_timer = ContextVar("perf_render_timer", default=None)
+
+
+def _count_async_query(execute, sql, params, many, context):
+    counter = _async_queries.get()
+    if counter is None:
+        return execute(sql, params, many, context)
+    return counter(execute, sql, params, many, context)
+
+
+def _install_async_counter(sender, connection, **kwargs):
+    if _count_async_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_count_async_query)
+
+
+def _sampled(rate):
+    return rate >= 1 or (rate > 0 and random.random() < rate)
+
+
+class PerformanceMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+            connection_created.connect(_install_async_counter)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        queries = QueryCounter()
+        profiler = cProfile.Profile() if _sampled(settings.PERF_PROFILE_SAMPLE_RATE) else None
+        request._perf_render_start = None
+        timer = RenderTimer()
+        token = render_timer.set(timer)
+
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(queries))
+            if profiler:
+                profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                if profiler:
+                    profiler.disable()
+                render_timer.reset(token)
+        end = time.perf_counter()
+
+        self.record(request, response, queries, timer, start, end)
+        if profiler:
+            self.dump_profile(request, profiler)
+        return response
+
+    async def __acall__(self, request):
+        queries = QueryCounter()
+        token = _async_queries.set(queries)
+        request._perf_render_start = None
+        timer = RenderTimer()
+        timer_token = render_timer.set(timer)
+
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            render_timer.reset(timer_token)
+            _async_queries.reset(token)
+        end = time.perf_counter()
+
+        self.record(request, response, queries, timer, start, end)
+        return response
+
+    def record(self, request, response, queries, timer, start, end):
+        render_start = request._perf_render_start
+        if render_start:
+            # Templates rendered after the hook are inside this window already
+            render = request._perf_view_render + end - render_start
+        else:
+            render = timer.duration
+        metrics = {
+            "total": end - start,
+            "db": queries.duration,
+            "queries": queries.count,
+            "render": render,
+            "size": None if response.streaming else len(response.content),
+        }
+        request.performance = metrics
+        metrics_registry.observe(
+            "smartcalc_request_duration_seconds", metrics["total"],
+            {"view": self.view_name(request) or "unresolved"},
+        )
+
+        if settings.PERF_SERVER_TIMING:
+            response["Server-Timing"] = self.server_timing(metrics)
+        self.log(request, response, metrics)
+
+    def process_template_response(self, request, response):
+        # DRF Responses and TemplateResponses are rendered after this hook,
+        # so everything from here on counts as render time.
+        timer = render_timer.get()
+        request._perf_view_render = timer.duration if timer else 0.0
+        request._perf_render_start = time.perf_counter()
+        return response
+
+    @staticmethod
+    def server_timing(metrics):
+        return ", ".join([
+            "app;dur=%.1f" % (metrics["total"] * 1000),
+            'db;dur=%.1f;desc="%d queries"' % (metrics["db"] * 1000, metrics["queries"]),
+            "render;dur=%.1f" % (metrics["render"] * 1000),
+        ])
+
+    @staticmethod
+    def view_name(request):
+        match = getattr(request, "resolver_match", None)
+        return match.view_name if match else None
+
+    def log(self, request, response, metrics):
+        too_many = metrics["queries"] > settings.PERF_QUERY_WARN_THRESHOLD
+        if not too_many and not _sampled(settings.PERF_LOG_SAMPLE_RATE):
+            return
+
+        record = {
+            "method": request.method,
+            "path": request.path,
+            "view": self.view_name(request),
+            "status": response.status_code,
+            "duration_ms": round(metrics["total"] * 1000, 2),
+            "db_ms": round(metrics["db"] * 1000, 2),
+            "queries": metrics["queries"],
+            "render_ms": round(metrics["render"] * 1000, 2),
+            "size": metrics["size"],
+        }
+        # Serialized on the logging listener thread (core.jsonlog)
+        logger.log(logging.WARNING if too_many else logging.INFO, record)
+
+    def dump_profile(self, request, profiler):
+        os.makedirs(settings.PERF_PROFILE_DIR, exist_ok=True)
+        name = "%d-%s-%d.prof" % (
+            time.time() * 1000, self.view_name(request) or "unresolved", os.getpid()
+        )
+        profiler.dump_stats(os.path.join(settings.PERF_PROFILE_DIR, name.replace(":", "_")))
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoiseMiddleware that can also sit in an async middleware chain.
+
+    Looking a file up is a dict lookup (or a stat() with autorefresh), so
+    it is done inline; everything else is awaited straight through.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, **kwargs):
+        super().__init__(get_response, **kwargs)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = self.find_file(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return self.serve(static_file, request)
+        return await self.get_response(request)
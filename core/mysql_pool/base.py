@@ -0,0 +1,45 @@
+"""
+MySQL backend that borrows connections from a per-process pool.
+
+Configured through the ``POOL`` key of the database settings::
+
+    'ENGINE': 'core.mysql_pool',
+    'POOL': {'MAX_SIZE': 10, 'TIMEOUT': 10, 'RECYCLE': 3600, 'HEALTH_CHECKS': True},
+
+Django's ``close()`` hands the connection back to the pool instead of
+closing the socket, so with ``CONN_MAX_AGE = 0`` each request borrows a
+connection for its own duration and threaded workers share the pool.
+"""
+
+from django.db.backends.mysql.base import DatabaseWrapper as MySQLDatabaseWrapper
+
+from core.dbpool import get_pool
+
+
+class DatabaseWrapper(MySQLDatabaseWrapper):
+    @property
+    def pool(self):
+        options = self.settings_dict.get("POOL", {})
+        return get_pool(
+            self.alias,
+            lambda: super(DatabaseWrapper, self).get_new_connection(self.get_connection_params()),
+            max_size=options.get("MAX_SIZE", 10),
+            timeout=options.get("TIMEOUT", 10),
+            recycle=options.get("RECYCLE", 3600),
+            ping=(lambda conn: conn.ping(False)) if options.get("HEALTH_CHECKS", True) else None,
+        )
+
+    def get_new_connection(self, conn_params):
+        return self.pool.acquire()
+
+    def _close(self):
+        if self.connection is None:
+            return
+        discard = self.errors_occurred
+        if not discard:
+            try:
+                # Never hand out a connection with an open transaction.
+                self.connection.rollback()
+            except Exception:
+                discard = True
+        self.pool.release(self.connection, discard=discard)
@@ -40,23 +40,24 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
+    'core.middleware.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    # Static files are answered here, before sessions, CSRF, auth and messages
+    'core.middleware.StaticFilesMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
 ]
 
 ROOT_URLCONF = 'core.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.templating.TimedDjangoTemplates',
         'DIRS': [BASE_DIR / 'adminpanel' / 'templates'],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.debug',
@@ -64,12 +65,25 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            # Templates are compiled once per process in every mode; the
+            # runserver autoreloader still resets them when a file changes.
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
         },
     },
 ]
 
 
 WSGI_APPLICATION = 'core.wsgi.application'
+ASGI_APPLICATION = 'core.asgi.application'
+
+# Serve core.asgi from uvicorn workers (see gunicorn.conf.py) and route the
+# announcement, /me and token refresh endpoints to their async views
+ASGI_MODE = os.getenv("ASGI_MODE", "False") == "True"
 
 
 # -------------------------------
@@ -78,16 +92,29 @@ WSGI_APPLICATION = 'core.wsgi.application'
 import pymysql
 pymysql.install_as_MySQLdb()
 
+# DB_POOL_SIZE > 0 serves connections from a per-process pool (core.mysql_pool);
+# DB_POOL_SIZE = 0 falls back to Django's own persistent connections, kept
+# for DB_CONN_MAX_AGE seconds.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+
 CLOUD_DB = {
-    'ENGINE': 'django.db.backends.mysql',
+    'ENGINE': 'core.mysql_pool' if DB_POOL_SIZE else 'django.db.backends.mysql',
     'NAME': os.getenv("DB_NAME"),
     'USER': os.getenv("DB_USER"),
     'PASSWORD': os.getenv("DB_PASSWORD"),
     'HOST': os.getenv("DB_HOST"),
     'PORT': os.getenv("DB_PORT", "3306"),
+    'CONN_MAX_AGE': int(os.getenv("DB_CONN_MAX_AGE", "0" if DB_POOL_SIZE else "60")),
+    'CONN_HEALTH_CHECKS': True,
     'OPTIONS': {
         'charset': 'utf8mb4',
-    }
+    },
+    'POOL': {
+        'MAX_SIZE': DB_POOL_SIZE,
+        'TIMEOUT': int(os.getenv("DB_POOL_TIMEOUT", "10")),
+        'RECYCLE': int(os.getenv("DB_POOL_RECYCLE", "3600")),
+        'HEALTH_CHECKS': True,
+    },
 }
 
 LOCAL_DB = {
@@ -95,22 +122,170 @@ LOCAL_DB = {
     'NAME': BASE_DIR / 'db.sqlite3',
 }
 
-# Try connecting to cloud DB first
-try:
-    import MySQLdb
-    conn = MySQLdb.connect(
-        host=CLOUD_DB['HOST'],
-        user=CLOUD_DB['USER'],
-        passwd=CLOUD_DB['PASSWORD'],
-        db=CLOUD_DB['NAME'],
-        port=int(CLOUD_DB['PORT'])
-    )
-    conn.close()
+# Pick the cloud DB only if it answered a recent probe. The probe result is
+# shared through DB_HEALTH_FILE, and gunicorn runs it once in the master
+# (see gunicorn.conf.py), so workers and manage.py commands boot without
+# touching MySQL. DB_HEALTH_TTL=0 probes on every start.
+from core.dbhealth import cloud_is_healthy
+
+DB_CONNECT_TIMEOUT = int(os.getenv("DB_CONNECT_TIMEOUT", "3"))
+DB_HEALTH_TTL = int(os.getenv("DB_HEALTH_TTL", "300"))
+DB_HEALTH_FILE = os.getenv("DB_HEALTH_FILE", str(BASE_DIR / 'logs' / 'db_health.json'))
+
+CLOUD_DB['OPTIONS']['connect_timeout'] = DB_CONNECT_TIMEOUT
+
+if cloud_is_healthy(CLOUD_DB, DB_HEALTH_FILE, DB_CONNECT_TIMEOUT, DB_HEALTH_TTL):
     DATABASES = {'default': CLOUD_DB}
-    print("Using cloud MySQL database.")
-except Exception as e:
+else:
     DATABASES = {'default': LOCAL_DB}
-    print("Cloud database connection failed, using local SQLite. Error:", e)
+
+
+# -------------------------------
+# CACHES
+# -------------------------------
+# A full cache drops a third of its entries at random, whatever their
+# timeout, and the file cache lists its whole directory on every set() or
+# add() to find out whether it is full. So each kind of entry gets a cache
+# sized for it, and the per-request writes stay off large directories:
+#   default   sessions, version keys and cached pages; rarely written
+#   throttle  login attempt counters, shared by the workers on the host
+#   revoked   rotated refresh tokens in front of the RevokedToken table;
+#             per process by default, so a refresh writes to memory only
+# Each can be moved to Redis with its *_BACKEND and *_LOCATION variables.
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", 'core.filecache.FileBasedCache')
+CACHE_LOCATION = os.getenv("CACHE_LOCATION", str(BASE_DIR / 'cache'))
+
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': CACHE_LOCATION,
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv("CACHE_MAX_ENTRIES", "5000")),
+        },
+    },
+    'throttle': {
+        'BACKEND': os.getenv("THROTTLE_CACHE_BACKEND", 'core.filecache.FileBasedCache'),
+        'LOCATION': os.getenv("THROTTLE_CACHE_LOCATION", str(BASE_DIR / 'cache' / 'throttle')),
+        'OPTIONS': {
+            # Two windows per IP and per identifier attempted recently
+            'MAX_ENTRIES': int(os.getenv("THROTTLE_CACHE_MAX_ENTRIES", "2000")),
+        },
+    },
+    'revoked': {
+        'BACKEND': os.getenv(
+            "REVOKED_CACHE_BACKEND", 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv("REVOKED_CACHE_LOCATION", 'revoked-tokens'),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv("REVOKED_CACHE_MAX_ENTRIES", "10000")),
+        },
+    },
+}
+
+# Seconds a worker trusts its own copy of the active announcement
+ANNOUNCEMENT_CACHE_LOCAL_TTL = float(os.getenv("ANNOUNCEMENT_CACHE_LOCAL_TTL", "1"))
+ANNOUNCEMENT_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Long-polls on /api/announcements/active/wait/ (announcements.notify)
+ANNOUNCEMENT_LONGPOLL_TIMEOUT = float(os.getenv("ANNOUNCEMENT_LONGPOLL_TIMEOUT", "30"))
+ANNOUNCEMENT_WATCH_INTERVAL = float(os.getenv("ANNOUNCEMENT_WATCH_INTERVAL", "1"))
+
+# Admin panel user statistics; refreshed on User save/delete, 0 disables
+ADMIN_STATS_CACHE_TIMEOUT = int(os.getenv("ADMIN_STATS_CACHE_TIMEOUT", "300"))
+
+# Dashboard fragments keyed on the user table version (adminpanel.stats);
+# 0 disables fragment caching
+ADMIN_FRAGMENT_CACHE_TIMEOUT = int(os.getenv("ADMIN_FRAGMENT_CACHE_TIMEOUT", str(60 * 60 * 24)))
+ADMIN_RECENT_USERS = 5
+
+# Admin panel user list (adminpanel.search): users per page, and how many
+# search matches are sorted by date before a search walks the date index
+ADMIN_USER_PAGE_SIZE = 10
+ADMIN_USER_SEARCH_SORT_LIMIT = int(os.getenv("ADMIN_USER_SEARCH_SORT_LIMIT", "2000"))
+
+# Audit trail writer (adminpanel.audit): events held in memory per process,
+# rows per bulk insert, and seconds an event may wait for a batch
+AUDIT_QUEUE_SIZE = int(os.getenv("AUDIT_QUEUE_SIZE", "10000"))
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "500"))
+AUDIT_FLUSH_INTERVAL = float(os.getenv("AUDIT_FLUSH_INTERVAL", "1"))
+AUDIT_PAGE_SIZE = 50
+
+
+# Log in with a username or an email address (see users.backends)
+AUTHENTICATION_BACKENDS = [
+    'users.backends.UsernameOrEmailBackend',
+]
+
+
+# Login attempts allowed per client IP and per username/email, as
+# "<attempts>/<s|m|h|d>" (see users.throttling); empty disables a limit
+LOGIN_THROTTLE_RATES = {
+    'ip': os.getenv("LOGIN_THROTTLE_IP_RATE", "30/m"),
+    'identifier': os.getenv("LOGIN_THROTTLE_IDENTIFIER_RATE", "10/m"),
+}
+LOGIN_THROTTLE_LOCAL_SIZE = 10000
+
+
+# -------------------------------
+# Sessions (admin panel)
+# -------------------------------
+# SESSION_BACKEND picks the session store:
+#   cached_db       reads from the shared cache, falls back to django_session
+#   cache           the shared cache only; sessions end if it is cleared
+#   signed_cookies  no server-side state; logout cannot revoke a copied cookie
+#   db              django_session only, one query per request
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "cached_db")
+
+_SESSION_ENGINES = {
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'cache': 'django.contrib.sessions.backends.cache',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+    'db': 'django.contrib.sessions.backends.db',
+}
+
+SESSION_ENGINE = _SESSION_ENGINES[SESSION_BACKEND]
+
+# Sessions are only written when they change; expired django_session rows
+# are deleted by "manage.py purge_sessions"
+SESSION_SAVE_EVERY_REQUEST = False
+
+
+# -------------------------------
+# Password hashing
+# -------------------------------
+# PASSWORD_HASHER picks the hasher for new hashes; the others stay listed so
+# existing hashes still verify and are upgraded on the next login.
+PASSWORD_HASHER = os.getenv("PASSWORD_HASHER", "pbkdf2")
+
+_PASSWORD_HASHERS = {
+    'pbkdf2': 'users.hashers.TunedPBKDF2PasswordHasher',
+    'scrypt': 'users.hashers.TunedScryptPasswordHasher',
+    'argon2': 'users.hashers.TunedArgon2PasswordHasher',
+}
+
+PASSWORD_HASHERS = [_PASSWORD_HASHERS[PASSWORD_HASHER]] + [
+    hasher for name, hasher in _PASSWORD_HASHERS.items() if name != PASSWORD_HASHER
+] + ['django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher']
+
+PASSWORD_PBKDF2_ITERATIONS = int(os.getenv("PASSWORD_PBKDF2_ITERATIONS", "1000000"))
+PASSWORD_SCRYPT_WORK_FACTOR = int(os.getenv("PASSWORD_SCRYPT_WORK_FACTOR", str(2 ** 14)))
+PASSWORD_SCRYPT_BLOCK_SIZE = int(os.getenv("PASSWORD_SCRYPT_BLOCK_SIZE", "8"))
+PASSWORD_SCRYPT_PARALLELISM = int(os.getenv("PASSWORD_SCRYPT_PARALLELISM", "5"))
+PASSWORD_ARGON2_TIME_COST = int(os.getenv("PASSWORD_ARGON2_TIME_COST", "2"))
+PASSWORD_ARGON2_MEMORY_COST = int(os.getenv("PASSWORD_ARGON2_MEMORY_COST", "102400"))
+PASSWORD_ARGON2_PARALLELISM = int(os.getenv("PASSWORD_ARGON2_PARALLELISM", "8"))
+
+# Hashing runs on a per-process thread pool (users.hashing)
+PASSWORD_HASHING_WORKERS = int(os.getenv("PASSWORD_HASHING_WORKERS", str(os.cpu_count() or 1)))
+PASSWORD_HASHING_MAX_PENDING = int(
+    os.getenv("PASSWORD_HASHING_MAX_PENDING", str(4 * PASSWORD_HASHING_WORKERS))
+)
+PASSWORD_HASHING_TIMEOUT = float(os.getenv("PASSWORD_HASHING_TIMEOUT", "10"))
+# Share of the workers that imports (HashingExecutor.map) may use at once
+PASSWORD_HASHING_BATCH_SHARE = float(os.getenv("PASSWORD_HASHING_BATCH_SHARE", "0.5"))
+
+# Rows per transaction for /api/users/import/
+USER_IMPORT_BATCH_SIZE = int(os.getenv("USER_IMPORT_BATCH_SIZE", "500"))
 
 
 # Password validation
@@ -142,7 +317,21 @@ STATIC_URL = '/static/'
 
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+# collectstatic writes content-hashed copies plus .br (with Brotli installed)
+# and .gz variants; WhiteNoise serves the hashed names with a far-future
+# "immutable" Cache-Control and picks the smallest encoding the client accepts.
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage',
+    },
+}
+
+# Unhashed URLs (e.g. /static/images/logonew.png linked from outside) are
+# cached for an hour
+WHITENOISE_MAX_AGE = 0 if DEBUG else 3600
 
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
@@ -153,8 +342,12 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # -------------------------------
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
-    )
+        'users.authentication.ClaimsJWTAuthentication',
+    ),
+    # Proxies in front of gunicorn that append to X-Forwarded-For; the client
+    # IP (login throttling) is the address the outermost of them saw. 0 uses
+    # REMOTE_ADDR and ignores the header, which clients can set to anything.
+    'NUM_PROXIES': int(os.getenv("NUM_PROXIES", "0")),
 }
 
 SIMPLE_JWT = {
@@ -165,38 +358,87 @@ SIMPLE_JWT = {
     'ROTATE_REFRESH_TOKENS': True,    
     'BLACKLIST_AFTER_ROTATION': True,
     'AUTH_HEADER_TYPES': ('Bearer',),
+    # Rotated tokens are revoked in users.RevokedToken (see users.tokens)
+    'TOKEN_REFRESH_SERIALIZER': 'users.serializers.RotatingTokenRefreshSerializer',
 }
 
+# Rows kept per worker for tokens that still need a User lookup
+JWT_USER_CACHE_TTL = int(os.getenv("JWT_USER_CACHE_TTL", "30"))
+JWT_USER_CACHE_SIZE = 1024
+
 
 # CORS setup
 CORS_ALLOW_ALL_ORIGINS = True
 
-# Logging configuration
+# -------------------------------
+# Performance instrumentation (core.middleware.PerformanceMiddleware)
+# -------------------------------
+PERF_SERVER_TIMING = os.getenv("PERF_SERVER_TIMING", str(DEBUG)) == "True"
+PERF_LOG_SAMPLE_RATE = float(os.getenv("PERF_LOG_SAMPLE_RATE", "1"))
+PERF_QUERY_WARN_THRESHOLD = int(os.getenv("PERF_QUERY_WARN_THRESHOLD", "20"))
+PERF_PROFILE_SAMPLE_RATE = float(os.getenv("PERF_PROFILE_SAMPLE_RATE", "0"))
+PERF_PROFILE_DIR = os.path.join(BASE_DIR, 'logs/profiles')
+
+# Metrics shared between workers through per-process files (core.metrics)
+METRICS_DIR = os.getenv("METRICS_DIR", str(BASE_DIR / 'metrics'))
+METRICS_FLUSH_INTERVAL = 1.0
+# /metrics requires "Authorization: Bearer <METRICS_TOKEN>" when it is set.
+# Otherwise only REMOTE_ADDR is checked against METRICS_ALLOWED_IPS, which
+# a reverse proxy on the same host turns into 127.0.0.1 for every client,
+# so with NUM_PROXIES set /metrics is refused until METRICS_TOKEN is set.
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+METRICS_ALLOWED_IPS = os.getenv("METRICS_ALLOWED_IPS", "127.0.0.1,::1").split(",")
+
+# Logging: JSON lines written off the request path by a queue listener
+# thread per worker, rotated by size and by UTC period, and gzipped
+# (core.jsonlog). Read them with: python -m core.logcat --help
+LOG_DIR = os.path.join(BASE_DIR, 'logs')
+ERROR_LOG_FILE = os.path.join(LOG_DIR, 'errors.jsonl')
+REQUEST_LOG_FILE = os.path.join(LOG_DIR, 'requests.jsonl')
+LOG_ROTATE_SECONDS = int(os.getenv("LOG_ROTATE_SECONDS", str(24 * 60 * 60)))
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
 
-    'formatters': {
-        'simple': {
-            'format': '{levelname} {message}',
-            'style': '{',
-        },
-    },
-
     'handlers': {
-        'file': {
+        'errors': {
             'level': 'ERROR',
-            'class': 'logging.FileHandler',
-            'filename': os.path.join(BASE_DIR, 'logs/system_errors.log'),
-            'formatter': 'simple',
+            '()': 'core.jsonlog.QueuedJSONLHandler',
+            'filename': ERROR_LOG_FILE,
+            'max_bytes': int(os.getenv("ERROR_LOG_MAX_BYTES", str(5 * 1024 * 1024))),
+            'backup_count': int(os.getenv("ERROR_LOG_BACKUP_COUNT", "5")),
+            'rotate_seconds': LOG_ROTATE_SECONDS,
+            'queue_size': LOG_QUEUE_SIZE,
+        },
+        # One access record per request from PerformanceMiddleware
+        'requests': {
+            'level': 'INFO',
+            '()': 'core.jsonlog.QueuedJSONLHandler',
+            'filename': REQUEST_LOG_FILE,
+            'max_bytes': int(os.getenv("REQUEST_LOG_MAX_BYTES", str(20 * 1024 * 1024))),
+            'backup_count': int(os.getenv("REQUEST_LOG_BACKUP_COUNT", "14")),
+            'rotate_seconds': LOG_ROTATE_SECONDS,
+            'queue_size': LOG_QUEUE_SIZE,
         },
     },
 
     'loggers': {
         'django': {
-            'handlers': ['file'],
+            'handlers': ['errors'],
             'level': 'ERROR',
             'propagate': True,
         },
+        'performance': {
+            'handlers': ['requests'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'adminpanel.audit': {
+            'handlers': ['errors'],
+            'level': 'ERROR',
+            'propagate': False,
+        },
     },
 }
@@ -0,0 +1,42 @@
+"""
+Streaming responses that stay streamed under ASGI.
+
+Django's ASGI handler reads a StreamingHttpResponse built on a sync
+iterator with sync_to_async(list), so the whole body is in memory before
+the first byte goes out. streaming_response() hands it an async iterator
+instead. It pulls the sync iterator a batch of parts at a time on the
+request's thread, where the view ran and opened its database cursor.
+Under WSGI the iterator is passed through unchanged.
+"""
+
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+
+# Parts pulled per trip to the request's thread
+BATCH_SIZE = 500
+
+
+async def _in_batches(iterator, size):
+    next_batch = sync_to_async(lambda: list(islice(iterator, size)))
+    try:
+        while batch := await next_batch():
+            for part in batch:
+                yield part
+    finally:
+        # Releases the database cursor of a generator that was not finished,
+        # for instance when the client went away
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            await sync_to_async(close)()
+
+
+def streaming_response(request, iterator, **kwargs):
+    """
+    A StreamingHttpResponse over iterator for request (an HttpRequest).
+    """
+    if isinstance(request, ASGIRequest):
+        iterator = _in_batches(iter(iterator), BATCH_SIZE)
+    return StreamingHttpResponse(iterator, **kwargs)
@@ -0,0 +1,36 @@
+"""
+A DjangoTemplates backend whose templates report their render time.
+
+Views using the render() shortcut return responses that are already
+rendered, so PerformanceMiddleware cannot time them on its own. Templates
+from this backend add their render time to the request's RenderTimer
+(core.middleware). Templates included by another are rendered through the
+engine, not the backend, so they are not counted twice.
+"""
+
+import time
+
+from django.template.backends.django import DjangoTemplates, Template
+
+from .middleware import render_timer
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        timer = render_timer.get()
+        if timer is None:
+            return super().render(context, request)
+
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            timer.duration += time.perf_counter() - start
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code).template, self)
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name).template, self)
@@ -0,0 +1,38 @@
+from django.template.loader import render_to_string
+from django.test import SimpleTestCase, TestCase, override_settings
+
+BEHIND_PROXY = {"NUM_PROXIES": 1}
+
+
+@override_settings(METRICS_TOKEN="", METRICS_ALLOWED_IPS=["127.0.0.1"])
+class MetricsAccessTests(SimpleTestCase):
+    def scrape(self, remote_addr="127.0.0.1", **headers):
+        return self.client.get("/metrics", REMOTE_ADDR=remote_addr, headers=headers)
+
+    def test_allowed_address_without_token(self):
+        self.assertEqual(self.scrape().status_code, 200)
+        self.assertEqual(self.scrape("10.0.0.7").status_code, 403)
+
+    @override_settings(REST_FRAMEWORK=BEHIND_PROXY)
+    def test_loopback_is_not_trusted_behind_a_proxy(self):
+        self.assertEqual(self.scrape().status_code, 403)
+
+    @override_settings(METRICS_TOKEN="s3cret", REST_FRAMEWORK=BEHIND_PROXY)
+    def test_token_is_required_once_set(self):
+        self.assertEqual(self.scrape().status_code, 403)
+        self.assertEqual(self.scrape(Authorization="Bearer wrong").status_code, 403)
+        self.assertEqual(self.scrape(Authorization="Bearer sécret").status_code, 403)
+        self.assertEqual(self.scrape("10.0.0.7", Authorization="Bearer s3cret").status_code, 200)
+
+
+class RenderTimeTests(TestCase):
+    def test_render_shortcut_is_counted_as_render_time(self):
+        response = self.client.get("/")
+        self.assertEqual(response.status_code, 200)
+
+        metrics = response.wsgi_request.performance
+        self.assertGreater(metrics["render"], 0)
+        self.assertLess(metrics["render"], metrics["total"])
+
+    def test_templates_render_outside_a_request(self):
+        self.assertEqual(render_to_string("adminpanel/admin_login.html").count("<form"), 1)
@@ -1,6 +1,8 @@
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include    
-from users.views import CustomLoginView
+from users.views import CustomLoginView, token_refresh_async
+from core.views import metrics
 from rest_framework_simplejwt.views import (
     TokenRefreshView,
 )
@@ -8,9 +10,16 @@ from rest_framework_simplejwt.views import (
 urlpatterns = [
     path('django-admin/', admin.site.urls),
 
+    # Internal Prometheus scrape endpoint
+    path('metrics', metrics, name='metrics'),
+
     # JWT Auth
     path('api/login/', CustomLoginView.as_view(), name='custom_token_obtain_pair'),
-    path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path(
+        'api/token/refresh/',
+        token_refresh_async if settings.ASGI_MODE else TokenRefreshView.as_view(),
+        name='token_refresh',
+    ),
 
     # Users app
     path('api/users/', include('users.urls')),
@@ -0,0 +1,29 @@
+import hmac
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+
+from . import metrics as metrics_registry
+
+
+def _may_scrape(request):
+    if settings.METRICS_TOKEN:
+        return hmac.compare_digest(
+            request.headers.get("Authorization", "").encode(),
+            f"Bearer {settings.METRICS_TOKEN}".encode(),
+        )
+    # Behind a proxy REMOTE_ADDR is the proxy's address for every client
+    if settings.REST_FRAMEWORK.get("NUM_PROXIES"):
+        return False
+    return request.META.get("REMOTE_ADDR") in settings.METRICS_ALLOWED_IPS
+
+
+def metrics(request):
+    """
+    Internal Prometheus scrape endpoint; reads no database rows.
+    """
+    if not _may_scrape(request):
+        return HttpResponseForbidden()
+    return HttpResponse(
+        metrics_registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
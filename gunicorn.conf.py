@@ -0,0 +1,45 @@
+"""
+Gunicorn configuration for SmartCalc.
+
+The cloud database probe runs once in the master before any worker is
+forked. Workers inherit the loaded settings, so booting or replacing a
+worker never opens a MySQL connection just to pick a database.
+
+ASGI_MODE=True serves core.asgi from uvicorn workers instead of core.wsgi
+from sync workers: each worker then holds thousands of idle keep-alive
+connections, and the async views answer the read-heavy endpoints without
+tying up a thread per request.
+
+WEB_CONCURRENCY sets the number of workers. By default there is one uvicorn
+worker per CPU, or two sync workers per CPU plus one, since a sync worker
+waits on the database with the CPU idle.
+"""
+
+import multiprocessing
+import os
+import shutil
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+asgi_mode = os.getenv("ASGI_MODE", "False") == "True"
+if asgi_mode:
+    wsgi_app = 'core.asgi:application'
+    worker_class = 'uvicorn_worker.UvicornWorker'
+else:
+    wsgi_app = 'core.wsgi:application'
+
+cpus = multiprocessing.cpu_count()
+workers = int(os.getenv(
+    "WEB_CONCURRENCY", cpus if asgi_mode else 2 * cpus + 1
+))
+
+
+def on_starting(server):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+    from django.conf import settings
+    settings.DATABASES
+
+    # Start every deployment with fresh per-worker metric files
+    shutil.rmtree(settings.METRICS_DIR, ignore_errors=True)
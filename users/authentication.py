@@ -0,0 +1,109 @@
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from django.contrib.auth.models import User
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from .user_cache import aget_cached_user, get_cached_user
+
+# Claims users.tokens adds to every access token (never to refresh tokens)
+USER_CLAIMS = ("username", "email", "is_staff", "is_superuser", "must_change_password")
+
+
+def user_claims(user):
+    """
+    The claims ClaimsJWTAuthentication reads, taken from a freshly loaded
+    user (with its userprofile, ideally select_related).
+    """
+    user_profile = getattr(user, 'userprofile', None)
+    return {
+        "username": user.username,
+        "email": user.email,
+        "is_staff": user.is_staff,
+        "is_superuser": user.is_superuser,
+        "must_change_password": user_profile.must_change_password if user_profile else False,
+    }
+
+
+class ClaimsUser(TokenUser):
+    """
+    A request user built only from access token claims.
+
+    Enough for permission checks and MeView; views that need the real row
+    (to change a password, for instance) load it by id.
+    """
+
+    @cached_property
+    def email(self):
+        return self.token.get("email", "")
+
+    @cached_property
+    def must_change_password(self):
+        return self.token.get("must_change_password", False)
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that trusts the user claims in the access token.
+
+    Requests carrying those claims never touch the database. The claims
+    are copied from the user row whenever an access token is issued, at
+    login and on every refresh, so a role change or deactivation takes
+    effect when the current access token expires. Tokens without the
+    claims fall back to a cached row lookup.
+    """
+
+    def claims_user(self, validated_token):
+        """
+        Returns a ClaimsUser, or None if the token predates the claims.
+        """
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        if all(claim in validated_token for claim in USER_CLAIMS):
+            return ClaimsUser(validated_token)
+        return None
+
+    def get_user(self, validated_token):
+        user = self.claims_user(validated_token)
+        if user is not None:
+            return user
+
+        try:
+            user = get_cached_user(validated_token[api_settings.USER_ID_CLAIM])
+        except User.DoesNotExist:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        return self.check_active(user)
+
+    async def aget_user(self, validated_token):
+        user = self.claims_user(validated_token)
+        if user is not None:
+            return user
+
+        try:
+            user = await aget_cached_user(validated_token[api_settings.USER_ID_CLAIM])
+        except User.DoesNotExist:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        return self.check_active(user)
+
+    @staticmethod
+    def check_active(user):
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        return user
+
+    async def aauthenticate(self, request):
+        """
+        authenticate() for plain Django async views; takes an HttpRequest.
+        """
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
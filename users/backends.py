@@ -0,0 +1,46 @@
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.models import User
+from django.db.models import Q
+from django.db.models.functions import Lower
+from .hashing import check_password, set_password
+
+
+class UsernameOrEmailBackend(ModelBackend):
+    """
+    Authenticates with either a username or an email address.
+
+    Both are resolved in a single query served by the username unique index
+    and the LOWER(email) index added in users.0002.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(User.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+
+        candidates = list(
+            User.objects.annotate(email_lower=Lower('email'))
+            .filter(Q(username=username) | Q(email_lower=username.lower()))[:3]
+        )
+        user = self.resolve(candidates, username)
+
+        if user is None:
+            # Run the password hasher once to reduce the timing difference
+            # between an existing and a nonexistent user (#20760).
+            set_password(User(), password)
+            return None
+
+        if check_password(user, password) and self.user_can_authenticate(user):
+            return user
+        return None
+
+    @staticmethod
+    def resolve(candidates, identifier):
+        # An exact username wins; an email only counts if it is unambiguous.
+        for user in candidates:
+            if user.username == identifier:
+                return user
+        if len(candidates) == 1:
+            return candidates[0]
+        return None
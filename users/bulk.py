@@ -0,0 +1,132 @@
+"""
+Streaming CSV / JSONL readers and writers for bulk user import and export.
+
+Rows are read from the request body line by line and results or exported
+users are written out as they are produced, so memory use does not depend
+on the size of the file.
+"""
+
+import csv
+import json
+from itertools import islice
+
+from django.contrib.auth.models import User
+
+from .provisioning import bulk_provision
+from .serializers import BulkUserRowSerializer, UserSerializer
+
+FORMATS = {
+    "csv": "text/csv",
+    "jsonl": "application/jsonl",
+}
+
+CONTENT_TYPES = {
+    "text/csv": "csv",
+    "application/jsonl": "jsonl",
+    "application/x-ndjson": "jsonl",
+    "application/x-jsonlines": "jsonl",
+}
+
+
+class Echo:
+    """A pseudo-buffer whose write() returns the value, for csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def detect_format(request):
+    """
+    Returns "csv" or "jsonl" from ?file_format= or the request content type.
+    """
+    requested = request.query_params.get("file_format")
+    if requested:
+        return requested if requested in FORMATS else None
+    return CONTENT_TYPES.get(request.content_type.split(";")[0].strip())
+
+
+def read_rows(stream, file_format):
+    """
+    Yields (line_number, row) pairs from a binary line stream.
+
+    Rows that cannot be decoded are yielded with row set to None.
+    """
+    lines = (line.decode("utf-8-sig") for line in stream)
+    if file_format == "csv":
+        reader = csv.DictReader(lines)
+        for row in reader:
+            # Empty cells mean "not given", so field defaults apply.
+            yield reader.line_num, {k: v for k, v in row.items() if k and v not in ("", None)}
+        return
+
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield line_number, row if isinstance(row, dict) else None
+
+
+def import_users(stream, file_format, batch_size):
+    """
+    Validates and provisions users from the stream, yielding one JSON line
+    per input row, in input order, followed by a summary line.
+    """
+    counts = {"created": 0, "failed": 0}
+
+    def result(line, username, error=None, user=None):
+        counts["failed" if error else "created"] += 1
+        if error:
+            return json.dumps({"line": line, "username": username,
+                               "status": "error", "errors": error}) + "\n"
+        return json.dumps({"line": line, "username": username,
+                           "status": "created", "id": user.pk}) + "\n"
+
+    rows = read_rows(stream, file_format)
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            break
+
+        # Validation needs no queries; conflicts are checked per batch by
+        # bulk_provision().
+        results, valid = {}, []
+        for line, row in batch:
+            if row is None:
+                results[line] = result(line, None, "Malformed row.")
+                continue
+            serializer = BulkUserRowSerializer(data=row)
+            if serializer.is_valid():
+                valid.append({**serializer.validated_data, "line": line})
+            else:
+                results[line] = result(line, row.get("username"), serializer.errors)
+
+        for outcome in bulk_provision(valid, batch_size=batch_size):
+            results[outcome.row["line"]] = result(
+                outcome.row["line"], outcome.row["username"], outcome.error, outcome.user
+            )
+
+        for line, _ in batch:
+            yield results[line]
+
+    yield json.dumps({"summary": counts}) + "\n"
+
+
+def export_users(file_format, chunk_size):
+    """
+    Yields every user's UserSerializer fields as CSV or JSONL lines.
+    """
+    fields = UserSerializer.Meta.fields
+    rows = User.objects.order_by("id").values_list(*fields).iterator(chunk_size=chunk_size)
+
+    if file_format == "csv":
+        writer = csv.writer(Echo())
+        yield writer.writerow(fields)
+        for row in rows:
+            yield writer.writerow(row)
+        return
+
+    for row in rows:
+        yield json.dumps(dict(zip(fields, row))) + "\n"
@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    Argon2PasswordHasher,
+    PBKDF2PasswordHasher,
+    ScryptPasswordHasher,
+)
+
+# The algorithm names are unchanged, so existing hashes keep verifying and
+# must_update() triggers a transparent rehash on the next successful login
+# whenever the cost parameters below are changed.
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    iterations = settings.PASSWORD_PBKDF2_ITERATIONS
+
+
+class TunedScryptPasswordHasher(ScryptPasswordHasher):
+    work_factor = settings.PASSWORD_SCRYPT_WORK_FACTOR
+    block_size = settings.PASSWORD_SCRYPT_BLOCK_SIZE
+    parallelism = settings.PASSWORD_SCRYPT_PARALLELISM
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    time_cost = settings.PASSWORD_ARGON2_TIME_COST
+    memory_cost = settings.PASSWORD_ARGON2_MEMORY_COST
+    parallelism = settings.PASSWORD_ARGON2_PARALLELISM
@@ -0,0 +1,212 @@
+"""
+Runs password hashing on a dedicated, bounded thread pool.
+
+PBKDF2, scrypt and Argon2 release the GIL while hashing, so a small pool
+sized to the CPU count lets a login burst use the cores without every
+request thread hashing at once. When more than PASSWORD_HASHING_MAX_PENDING
+hashes are queued, new ones are refused with HashingBusy instead of piling
+up behind the others; API views turn that into a 503. Batch jobs
+(map()) wait for a slot instead, and share at most
+PASSWORD_HASHING_BATCH_SHARE of the workers, so a bulk import never
+leaves logins without a thread or a queue slot.
+
+Only the hashing itself runs on the pool; database writes stay on the
+calling thread and its connection. The executor's stats() are exported
+on /metrics.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password, verify_password
+from rest_framework.exceptions import APIException
+
+from core import metrics
+
+
+class HashingBusy(APIException):
+    """Raised when the hashing queue is full or a hash did not finish in time."""
+    status_code = 503
+    default_detail = "Server is busy, please try again shortly."
+    default_code = "hashing_busy"
+
+
+class HashingExecutor:
+    def __init__(self, workers, max_pending, timeout, batch_share=0.5):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        # At least one, and never every slot unless there is only one
+        self.batch_slots = max(1, min(int(workers * batch_share), max_pending - 1))
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self._pending = threading.BoundedSemaphore(max_pending)
+        self._batch = threading.BoundedSemaphore(self.batch_slots)
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.queue_time = 0.0
+        self.hash_time = 0.0
+
+    def _submit(self, fn, args):
+        # The caller holds a _pending slot; _done gives it back.
+        with self._lock:
+            self.submitted += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+        queued_at = time.perf_counter()
+
+        def task():
+            started = time.perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                finished = time.perf_counter()
+                with self._lock:
+                    self.queue_time += started - queued_at
+                    self.hash_time += finished - started
+
+        future = self._pool.submit(task)
+        future.add_done_callback(self._done)
+        return future
+
+    def _done(self, future):
+        with self._lock:
+            self.in_flight -= 1
+            self.completed += 1
+        self._pending.release()
+
+    def run(self, fn, *args):
+        """
+        Runs fn(*args) on the pool and returns its result.
+        """
+        if not self._pending.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise HashingBusy("Too many password hashes queued.")
+
+        future = self._submit(fn, args)
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            with self._lock:
+                self.timed_out += 1
+            raise HashingBusy("Password hashing timed out.")
+
+    def map(self, fn, arg_tuples):
+        """
+        Runs fn(*args) for each args tuple on the pool, yielding results in order.
+
+        Meant for batch jobs: instead of being refused when the queue is
+        full, each submission waits for a free slot. All map() calls in the
+        process together hold at most batch_slots of them.
+        """
+        futures = deque()
+        for args in arg_tuples:
+            if len(futures) == self.batch_slots:
+                yield futures.popleft().result()
+            self._batch.acquire()
+            self._pending.acquire()
+            future = self._submit(fn, args)
+            future.add_done_callback(lambda future: self._batch.release())
+            futures.append(future)
+        while futures:
+            yield futures.popleft().result()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "batch_slots": self.batch_slots,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "timed_out": self.timed_out,
+                "in_flight": self.in_flight,
+                "peak_in_flight": self.peak_in_flight,
+                "queue_time": round(self.queue_time, 6),
+                "hash_time": round(self.hash_time, 6),
+            }
+
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """
+    Returns this process's executor, creating it after any fork.
+    """
+    global _executor, _executor_pid
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            workers = settings.PASSWORD_HASHING_WORKERS
+            _executor = HashingExecutor(
+                workers=workers,
+                max_pending=settings.PASSWORD_HASHING_MAX_PENDING,
+                timeout=settings.PASSWORD_HASHING_TIMEOUT,
+                batch_share=settings.PASSWORD_HASHING_BATCH_SHARE,
+            )
+            _executor_pid = os.getpid()
+        return _executor
+
+
+@metrics.register_collector
+def executor_metrics():
+    with _executor_lock:
+        executor = _executor if _executor_pid == os.getpid() else None
+    if executor is None:
+        return []
+    stats = executor.stats()
+    return [
+        ("smartcalc_password_hashes_total", {"result": "completed"}, stats["completed"]),
+        ("smartcalc_password_hashes_total", {"result": "rejected"}, stats["rejected"]),
+        ("smartcalc_password_hashes_total", {"result": "timed_out"}, stats["timed_out"]),
+        ("smartcalc_password_hash_seconds_total", {"phase": "queued"}, stats["queue_time"]),
+        ("smartcalc_password_hash_seconds_total", {"phase": "hashing"}, stats["hash_time"]),
+        ("smartcalc_password_hashes_in_flight", None, stats["in_flight"]),
+        ("smartcalc_password_hash_workers", {"batch": "yes"}, stats["batch_slots"]),
+        ("smartcalc_password_hash_workers", {"batch": "no"},
+         stats["workers"] - stats["batch_slots"]),
+    ]
+
+
+def set_password(user, raw_password):
+    """
+    Same as User.set_password(), with the hash computed on the executor.
+    """
+    user.password = get_executor().run(make_password, raw_password)
+    user._password = raw_password
+
+
+def make_passwords(raw_passwords):
+    """
+    Hashes many passwords in parallel on the executor, yielding them in order.
+    """
+    return get_executor().map(make_password, ((raw,) for raw in raw_passwords))
+
+
+def check_password(user, raw_password):
+    """
+    Same as User.check_password(), with the hash computed on the executor.
+
+    A correct password stored with an outdated hasher or cost is rehashed
+    with the preferred one and saved.
+    """
+    is_correct, must_update = get_executor().run(verify_password, raw_password, user.password)
+    if is_correct and must_update:
+        set_password(user, raw_password)
+        # Password hash upgrades shouldn't be considered password changes.
+        user._password = None
+        user.save(update_fields=["password"])
+    return is_correct
@@ -0,0 +1,32 @@
+"""
+Batched deletes for the cron cleanup commands (purge_sessions,
+prune_revoked_tokens).
+"""
+
+import time
+
+
+def add_batch_arguments(parser):
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument(
+        "--sleep", type=float, default=0.0,
+        help="Seconds to pause between batches to limit lock pressure.",
+    )
+
+
+def delete_in_batches(queryset, order_by, batch_size, sleep=0.0):
+    """
+    Deletes the rows of queryset batch_size at a time and returns how many
+    were deleted.
+
+    Each batch walks the index on order_by and deletes its rows by primary
+    key, so every DELETE only touches (and locks) that batch.
+    """
+    deleted = 0
+    while True:
+        pks = list(queryset.order_by(order_by).values_list("pk", flat=True)[:batch_size])
+        if not pks:
+            return deleted
+        deleted += queryset.model.objects.filter(pk__in=pks).delete()[0]
+        if sleep:
+            time.sleep(sleep)
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from users.management.batches import add_batch_arguments, delete_in_batches
+from users.models import RevokedToken
+
+
+class Command(BaseCommand):
+    help = (
+        "Deletes revoked refresh tokens that have expired, in small batches. "
+        "Meant to run from cron, e.g. hourly."
+    )
+
+    def add_arguments(self, parser):
+        add_batch_arguments(parser)
+
+    def handle(self, *args, **options):
+        deleted = delete_in_batches(
+            RevokedToken.objects.filter(expires_at__lt=timezone.now()),
+            "expires_at", options["batch_size"], options["sleep"],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired revoked tokens."))
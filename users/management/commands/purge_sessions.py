@@ -0,0 +1,22 @@
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from users.management.batches import add_batch_arguments, delete_in_batches
+
+
+class Command(BaseCommand):
+    help = (
+        "Deletes expired rows from django_session in small batches, unlike "
+        "clearsessions' single DELETE. Meant to run from cron, e.g. daily."
+    )
+
+    def add_arguments(self, parser):
+        add_batch_arguments(parser)
+
+    def handle(self, *args, **options):
+        deleted = delete_in_batches(
+            Session.objects.filter(expire_date__lt=timezone.now()),
+            "expire_date", options["batch_size"], options["sleep"],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired sessions."))
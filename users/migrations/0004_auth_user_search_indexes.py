@@ -0,0 +1,84 @@
+"""
+Indexes behind the admin panel user search (adminpanel.search).
+
+  - LOWER(username), next to 0002's LOWER(email), for prefix search;
+  - date_joined, the list order, and (is_superuser, is_staff, date_joined)
+    for a role filter, both ending in id as every secondary index does;
+  - a full-text index on username and email: FULLTEXT on MySQL, and on
+    SQLite an external-content FTS5 table kept in step by triggers.
+
+Django rebuilds a SQLite table, dropping its triggers, whenever a migration
+alters it; a later migration doing that to auth_user must run this again.
+"""
+
+from django.db import migrations, models
+from django.db.models.functions import Lower
+
+INDEXES = [
+    models.Index(Lower('username'), name='auth_user_username_lower_idx'),
+    models.Index(fields=['date_joined'], name='auth_user_date_joined_idx'),
+    models.Index(fields=['is_superuser', 'is_staff', 'date_joined'], name='auth_user_role_joined_idx'),
+]
+
+FULL_TEXT = {
+    'sqlite': [
+        "CREATE VIRTUAL TABLE auth_user_fts USING fts5("
+        "username, email, content='auth_user', content_rowid='id')",
+        "INSERT INTO auth_user_fts(auth_user_fts) VALUES ('rebuild')",
+        "CREATE TRIGGER auth_user_fts_insert AFTER INSERT ON auth_user BEGIN "
+        "INSERT INTO auth_user_fts(rowid, username, email) VALUES (new.id, new.username, new.email); "
+        "END",
+        "CREATE TRIGGER auth_user_fts_delete AFTER DELETE ON auth_user BEGIN "
+        "INSERT INTO auth_user_fts(auth_user_fts, rowid, username, email) "
+        "VALUES ('delete', old.id, old.username, old.email); "
+        "END",
+        "CREATE TRIGGER auth_user_fts_update AFTER UPDATE OF username, email ON auth_user BEGIN "
+        "INSERT INTO auth_user_fts(auth_user_fts, rowid, username, email) "
+        "VALUES ('delete', old.id, old.username, old.email); "
+        "INSERT INTO auth_user_fts(rowid, username, email) VALUES (new.id, new.username, new.email); "
+        "END",
+    ],
+    'mysql': [
+        "CREATE FULLTEXT INDEX auth_user_fulltext_idx ON auth_user (username, email)",
+    ],
+}
+
+DROP_FULL_TEXT = {
+    'sqlite': [
+        "DROP TRIGGER IF EXISTS auth_user_fts_update",
+        "DROP TRIGGER IF EXISTS auth_user_fts_delete",
+        "DROP TRIGGER IF EXISTS auth_user_fts_insert",
+        "DROP TABLE IF EXISTS auth_user_fts",
+    ],
+    'mysql': [
+        "DROP INDEX auth_user_fulltext_idx ON auth_user",
+    ],
+}
+
+
+def add_indexes(apps, schema_editor):
+    User = apps.get_model('auth', 'User')
+    for index in INDEXES:
+        schema_editor.add_index(User, index)
+    for sql in FULL_TEXT.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql)
+
+
+def remove_indexes(apps, schema_editor):
+    User = apps.get_model('auth', 'User')
+    for sql in DROP_FULL_TEXT.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql)
+    for index in INDEXES:
+        schema_editor.remove_index(User, index)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0003_revokedtoken'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_indexes, remove_indexes),
+    ]
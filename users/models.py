@@ -9,4 +9,17 @@ class UserProfile(models.Model):
     def __str__(self):
         return self.user.username
 
+class RevokedToken(models.Model):
+    """
+    A refresh token that was rotated or revoked and must not be used again.
+
+    Only revoked tokens are stored, one row per refresh, and each row is
+    pruned once the token would have expired anyway (prune_revoked_tokens).
+    """
+    jti = models.CharField(max_length=64, unique=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return self.jti
+
 # I will use Django's built-in User model for authentication.
@@ -0,0 +1,12 @@
+from rest_framework.pagination import CursorPagination
+
+
+class UserCursorPagination(CursorPagination):
+    """
+    Keyset pagination over the primary key, so every page is an index range
+    scan regardless of how deep the client has paged.
+    """
+    ordering = '-id'
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
@@ -0,0 +1,146 @@
+"""
+Creating users together with their profile in as few statements as possible.
+
+provision_user() issues one INSERT for the user and one for the profile
+(made by the post_save signal) inside a single transaction; the password
+is already hashed and the flags already set, so nothing is saved twice.
+
+bulk_provision() does the same for large batches with bulk_create(), which
+bypasses post_save, and announces each batch through users_bulk_created.
+"""
+
+from collections import namedtuple
+from itertools import islice
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.functions import Lower
+
+from .hashing import make_passwords, set_password
+from .models import UserProfile
+from .signals import users_bulk_created
+
+ProvisionResult = namedtuple("ProvisionResult", ["row", "user", "error"])
+
+
+class ProvisioningError(ValueError):
+    """Raised when a username or email is already taken."""
+
+
+def find_conflicts(usernames, emails):
+    """
+    Returns the taken usernames and lower-cased emails among the given ones.
+
+    One query, served by the username and LOWER(email) indexes.
+    """
+    emails = [e.lower() for e in emails if e]
+    taken = (
+        User.objects.annotate(email_lower=Lower('email'))
+        .filter(Q(username__in=usernames) | Q(email_lower__in=emails))
+        .values_list('username', 'email_lower')
+    )
+    taken_usernames, taken_emails = set(), set()
+    for username, email in taken:
+        taken_usernames.add(username)
+        taken_emails.add(email)
+    return taken_usernames, taken_emails
+
+
+def conflict_error(username, email, taken_usernames, taken_emails):
+    if username in taken_usernames:
+        return "Username already exists."
+    if email and email.lower() in taken_emails:
+        return "Email already exists."
+    return None
+
+
+def build_user(username, email="", is_staff=False, is_superuser=False):
+    return User(
+        username=username,
+        email=User.objects.normalize_email(email or ""),
+        is_staff=is_staff,
+        is_superuser=is_superuser,
+        is_active=True,
+    )
+
+
+def provision_user(username, email, password, is_staff=False, is_superuser=False,
+                   check_conflicts=True):
+    """
+    Creates one user and its profile in one transaction.
+
+    Raises ProvisioningError if check_conflicts is set and the username or
+    email is taken.
+    """
+    user = build_user(username, email, is_staff, is_superuser)
+    set_password(user, password)
+
+    with transaction.atomic():
+        if check_conflicts:
+            error = conflict_error(username, email, *find_conflicts([username], [email]))
+            if error:
+                raise ProvisioningError(error)
+        user.save()
+    return user
+
+
+def bulk_provision(rows, batch_size=500, must_change_password=True):
+    """
+    Creates users from an iterable of dicts with username, email, password,
+    is_staff and is_superuser keys, batch_size rows at a time.
+
+    Yields a ProvisionResult for every row, in order. Rows whose username or
+    email is taken, in the database or earlier in the input, get an error
+    and are skipped. Each batch is committed before the next is read, so
+    only one batch is held in memory at a time.
+    """
+    rows = iter(rows)
+
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            return
+
+        taken_usernames, taken_emails = find_conflicts(
+            [row["username"] for row in batch], [row.get("email", "") for row in batch]
+        )
+
+        results, accepted = [], []
+        for row in batch:
+            email = row.get("email", "")
+            error = conflict_error(row["username"], email, taken_usernames, taken_emails)
+            if error:
+                results.append(ProvisionResult(row, None, error))
+                continue
+            taken_usernames.add(row["username"])
+            if email:
+                taken_emails.add(email.lower())
+            user = build_user(
+                row["username"], email,
+                row.get("is_staff", False), row.get("is_superuser", False),
+            )
+            results.append(ProvisionResult(row, user, None))
+            accepted.append((row, user))
+
+        passwords = make_passwords(row["password"] for row, _ in accepted)
+        for (_, user), encoded in zip(accepted, passwords):
+            user.password = encoded
+
+        users = [user for _, user in accepted]
+        with transaction.atomic():
+            User.objects.bulk_create(users)
+            if users and users[0].pk is None:
+                # Backends that cannot return ids from a bulk insert (MySQL)
+                ids = dict(User.objects.filter(
+                    username__in=[u.username for u in users]
+                ).values_list('username', 'id'))
+                for user in users:
+                    user.pk = ids[user.username]
+            UserProfile.objects.bulk_create(
+                UserProfile(user=user, must_change_password=must_change_password)
+                for user in users
+            )
+        if users:
+            users_bulk_created.send(sender=User, users=users)
+        yield from results
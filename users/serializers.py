@@ -1,7 +1,12 @@
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
 from django.contrib.auth.models import User
 from django.contrib.auth import authenticate
+from django.contrib.auth.validators import UnicodeUsernameValidator
 from rest_framework import serializers
+from core import metrics
+from .provisioning import provision_user
+from .tokens import RevocableRefreshToken, rotate
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -18,35 +23,39 @@ class CreateUserSerializer(serializers.ModelSerializer):
         fields = ['username', 'email', 'password', 'is_staff', 'is_superuser']
 
     def create(self, validated_data):
-        # Create user with hashed password
-        user = User.objects.create_user(
+        # User, profile and flags in one transaction; the serializer's
+        # validators have already checked the username.
+        return provision_user(
             username=validated_data['username'],
             email=validated_data.get('email', ''),
-            password=validated_data['password']
+            password=validated_data['password'],
+            is_staff=validated_data.get('is_staff', False),
+            is_superuser=validated_data.get('is_superuser', False),
+            check_conflicts=False,
         )
 
-        # Set staff/admin status
-        user.is_staff = validated_data.get('is_staff', False)
-        user.is_superuser = validated_data.get('is_superuser', False)
-        user.save()
+class BulkUserRowSerializer(serializers.Serializer):
+    """
+    Validates one row of a bulk import without touching the database;
+    username and email conflicts are checked per batch when provisioning.
+    """
+    username = serializers.CharField(max_length=150, validators=[UnicodeUsernameValidator()])
+    email = serializers.EmailField(required=False, allow_blank=True, default='')
+    password = serializers.CharField()
+    is_staff = serializers.BooleanField(required=False, default=False)
+    is_superuser = serializers.BooleanField(required=False, default=False)
 
-        return user
 
 class CustomLoginSerializer(TokenObtainPairSerializer):
     username_field = User.USERNAME_FIELD
+    token_class = RevocableRefreshToken
 
     def validate(self, attrs):
         identifier = attrs.get("username")  # username OR email
         password = attrs.get("password")
 
-        # Resolve email → username
-        try:
-            user_obj = User.objects.get(email=identifier)
-            username = user_obj.username
-        except User.DoesNotExist:
-            username = identifier
-
-        user = authenticate(username=username, password=password)
+        # UsernameOrEmailBackend resolves username or email in one query
+        user = authenticate(username=identifier, password=password)
 
         if not user:
             raise serializers.ValidationError("Invalid username/email or password")
@@ -55,12 +64,31 @@ class CustomLoginSerializer(TokenObtainPairSerializer):
         self.user = user
 
         refresh = self.get_token(user)
+        access = refresh.access_token_for(user)
 
-        user_profile = getattr(user, 'userprofile', None)
-        must_change_password = user_profile.must_change_password if user_profile else False
         return {
             "refresh": str(refresh),
-            "access": str(refresh.access_token),
-            "must_change_password": must_change_password,
+            "access": str(access),
+            "must_change_password": access["must_change_password"],
         }
-    
\ No newline at end of file
+
+
+class RotatingTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Refresh serializer that revokes each rotated token in users.tokens and
+    issues access tokens with claims from the current user row.
+    """
+    token_class = RevocableRefreshToken
+
+    def validate(self, attrs):
+        try:
+            data = rotate(attrs["refresh"])
+        except TokenError as e:
+            # Raised by blacklist() when the token was already rotated
+            metrics.inc("smartcalc_token_refreshes_total", {"result": "failure"})
+            raise InvalidToken(e.args[0])
+        except Exception:
+            metrics.inc("smartcalc_token_refreshes_total", {"result": "failure"})
+            raise
+        metrics.inc("smartcalc_token_refreshes_total", {"result": "success"})
+        return data
@@ -1,7 +1,15 @@
-from django.db.models.signals import post_save
-from django.dispatch import receiver
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import Signal, receiver
 from django.contrib.auth.models import User
+from django.contrib.auth.hashers import identify_hasher, is_password_usable
+from .hashing import set_password
+from core import metrics
 from .models import UserProfile
+from .user_cache import forget_user
+
+# Sent with users=[...] after users.provisioning.bulk_provision() inserts a
+# batch, since bulk_create() does not send post_save.
+users_bulk_created = Signal()
 
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
@@ -11,11 +19,25 @@ def create_user_profile(sender, instance, created, **kwargs):
             instance.is_active = True
             instance.save(update_fields=['is_active'])
         
-        # Make sure the password is hashed
-        if not instance.password.startswith('pbkdf2_'):
-            raw_password = instance.password
-            instance.set_password(raw_password)
-            instance.save(update_fields=['password'])
+        # Make sure the password is hashed, whichever hasher is configured
+        if instance.password and is_password_usable(instance.password):
+            try:
+                identify_hasher(instance.password)
+            except ValueError:
+                set_password(instance, instance.password)
+                instance.save(update_fields=['password'])
 
         # Create the UserProfile
         UserProfile.objects.create(user=instance)
+        metrics.inc("smartcalc_users_created_total", {"source": "single"})
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_cached_user(sender, instance, **kwargs):
+    forget_user(instance.pk)
+
+
+@receiver(users_bulk_created)
+def count_bulk_created_users(sender, users, **kwargs):
+    metrics.inc("smartcalc_users_created_total", {"source": "bulk"}, len(users))
@@ -1,3 +1,195 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.test import RequestFactory, TestCase, override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from . import throttling, tokens, user_cache
+from .throttling import THROTTLE_KEY, SlidingWindowLimiter, check_login
+
+# Per-test caches, so nothing is left in the shared file cache
+LOCMEM_CACHES = {
+    alias: {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": alias}
+    for alias in ("default", "throttle", "revoked")
+}
+
+# A fast hasher; these tests are about tokens, not hashing cost
+FAST_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+
+# Starts a fixed window of one minute
+WINDOW_START = 1_000_020.0
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class SlidingWindowLimiterTests(TestCase):
+    def setUp(self):
+        caches["throttle"].clear()
+        throttling._blocked.clear()
+
+    def attempt(self, limiter, at, ident="1.2.3.4"):
+        # The limiter's clock only; the cache keeps its own
+        with mock.patch.object(throttling, "time") as clock:
+            clock.time.return_value = at
+            return limiter.attempt(ident)
+
+    def test_allows_attempts_under_the_limit(self):
+        limiter = SlidingWindowLimiter("ip", "3/m")
+        for second in range(3):
+            self.assertIsNone(self.attempt(limiter, WINDOW_START + second))
+
+    def test_blocks_at_the_limit_until_the_window_decays(self):
+        limiter = SlidingWindowLimiter("ip", "3/m")
+        for second in range(3):
+            self.attempt(limiter, WINDOW_START + second)
+
+        # Three attempts now, so all of this window and none carried over
+        self.assertEqual(self.attempt(limiter, WINDOW_START + 10), 50)
+        # The rejected attempt was taken back off the count
+        key = THROTTLE_KEY.format(scope="ip", ident="1.2.3.4", window=int(WINDOW_START // 60))
+        self.assertEqual(caches["throttle"].get(key), 3)
+
+    def test_previous_window_carries_over(self):
+        limiter = SlidingWindowLimiter("ip", "3/m")
+        for second in range(3):
+            self.assertIsNone(self.attempt(limiter, WINDOW_START - 60 + second))
+
+        # Halfway through the next window the previous three count as 1.5
+        self.assertIsNone(self.attempt(limiter, WINDOW_START + 30))
+        self.assertIsNone(self.attempt(limiter, WINDOW_START + 30))
+        # 1.5 + 2 is over the limit until 1.5 has decayed to 1, 10s later
+        self.assertAlmostEqual(self.attempt(limiter, WINDOW_START + 30), 10)
+        self.assertIsNone(self.attempt(limiter, WINDOW_START + 41))
+
+    def test_block_is_remembered_in_the_process(self):
+        limiter = SlidingWindowLimiter("ip", "1/m")
+        self.attempt(limiter, WINDOW_START)
+        self.assertEqual(self.attempt(limiter, WINDOW_START + 20), 40)
+
+        caches["throttle"].clear()
+        self.assertEqual(self.attempt(limiter, WINDOW_START + 30), 30)
+        self.assertIsNone(self.attempt(limiter, WINDOW_START + 30, ident="5.6.7.8"))
+
+    def test_zero_rate_turns_every_attempt_away(self):
+        limiter = SlidingWindowLimiter("ip", "0/m")
+        self.assertEqual(self.attempt(limiter, WINDOW_START + 15), 45)
+
+    @override_settings(LOGIN_THROTTLE_RATES={"ip": "0/m", "identifier": "10/m"})
+    def test_zero_rate_login_is_throttled(self):
+        response = self.client.post("/api/login/", {"username": "x", "password": "y"})
+        self.assertEqual(response.status_code, 429)
+
+
+@override_settings(
+    CACHES=LOCMEM_CACHES,
+    LOGIN_THROTTLE_RATES={"ip": "2/m", "identifier": None},
+)
+class LoginClientAddressTests(TestCase):
+    def setUp(self):
+        caches["throttle"].clear()
+        throttling._blocked.clear()
+
+    def login_from(self, remote_addr, forwarded_for):
+        request = RequestFactory().post(
+            "/api/login/", REMOTE_ADDR=remote_addr, HTTP_X_FORWARDED_FOR=forwarded_for,
+        )
+        return check_login(request, None)
+
+    def test_forwarded_for_is_ignored_without_proxies(self):
+        self.assertIsNone(self.login_from("9.9.9.9", "1.1.1.1"))
+        self.assertIsNone(self.login_from("9.9.9.9", "2.2.2.2"))
+        self.assertIsNotNone(self.login_from("9.9.9.9", "3.3.3.3"))
+
+    @override_settings(REST_FRAMEWORK={"NUM_PROXIES": 1})
+    def test_one_proxy_trusts_only_the_address_it_added(self):
+        # The client controls everything before the proxy's own entry
+        self.assertIsNone(self.login_from("10.0.0.1", "1.1.1.1, 9.9.9.9"))
+        self.assertIsNone(self.login_from("10.0.0.1", "2.2.2.2, 9.9.9.9"))
+        self.assertIsNotNone(self.login_from("10.0.0.1", "3.3.3.3, 9.9.9.9"))
+        self.assertIsNone(self.login_from("10.0.0.1", "9.9.9.8"))
+
+
+@override_settings(CACHES=LOCMEM_CACHES, PASSWORD_HASHERS=FAST_HASHERS)
+class TokenClaimsTests(TestCase):
+    password = "Correct-Horse-7"
+
+    def setUp(self):
+        for alias in LOCMEM_CACHES:
+            caches[alias].clear()
+        throttling._blocked.clear()
+        user_cache._users.clear()
+        self.user = User.objects.create_user("alice", "alice@example.com", self.password)
+        self.user.is_staff = True
+        self.user.save()
+
+    def login(self):
+        response = self.client.post(
+            "/api/login/", {"username": "alice", "password": self.password},
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def refresh(self, refresh):
+        return self.client.post("/api/token/refresh/", {"refresh": refresh})
+
+    def get(self, url, access):
+        return self.client.get(url, headers={"Authorization": f"Bearer {access}"})
+
+    def test_refresh_rereads_claims(self):
+        tokens_ = self.login()
+        self.assertTrue(AccessToken(tokens_["token"])["must_change_password"])
+
+        self.user.email = "alice@example.org"
+        self.user.userprofile.must_change_password = False
+        self.user.save()
+        self.user.userprofile.save()
+
+        response = self.refresh(tokens_["refresh"])
+        self.assertEqual(response.status_code, 200)
+        access = AccessToken(response.json()["access"])
+        self.assertEqual(access["email"], "alice@example.org")
+        self.assertFalse(access["must_change_password"])
+
+    def test_refresh_token_carries_no_claims(self):
+        refresh = tokens.RevocableRefreshToken(self.login()["refresh"])
+        for claim in ("username", "email", "is_staff", "is_superuser", "must_change_password"):
+            self.assertNotIn(claim, refresh.payload)
+
+    def test_demoted_user_loses_admin_access_on_refresh(self):
+        tokens_ = self.login()
+        self.assertEqual(self.get("/api/users/list/", tokens_["token"]).status_code, 200)
+
+        self.user.is_staff = False
+        self.user.save()
+
+        response = self.refresh(tokens_["refresh"])
+        self.assertEqual(response.status_code, 200)
+        access = response.json()["access"]
+        self.assertFalse(AccessToken(access)["is_staff"])
+        self.assertEqual(self.get("/api/users/list/", access).status_code, 403)
+
+    def test_deactivated_user_cannot_refresh(self):
+        tokens_ = self.login()
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.refresh(tokens_["refresh"]).status_code, 401)
+
+    def test_rotated_refresh_token_cannot_be_reused(self):
+        refresh = self.login()["refresh"]
+        self.assertEqual(self.refresh(refresh).status_code, 200)
+        self.assertEqual(self.refresh(refresh).status_code, 401)
+
+    def test_change_password_invalidates_cached_user(self):
+        access = self.login()["token"]
+        user_cache.get_cached_user(self.user.pk)
+
+        response = self.client.post(
+            "/api/users/change-password/",
+            {"current_password": self.password, "new_password": "Battery-Staple-9"},
+            headers={"Authorization": f"Bearer {access}"},
+        )
+        self.assertEqual(response.status_code, 200)
+
+        cached = user_cache.get_cached_user(self.user.pk)
+        self.assertTrue(cached.check_password("Battery-Staple-9"))
+        self.assertFalse(cached.userprofile.must_change_password)
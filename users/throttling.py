@@ -0,0 +1,173 @@
+"""
+Login throttling with sliding-window counters in the shared cache.
+
+Each limiter keeps two integers per key, the attempt counts of the current
+and the previous fixed window, and estimates the sliding window as
+
+    previous * (1 - elapsed / window) + current
+
+so memory per key is constant, unlike DRF's timestamp-list throttles.
+Counters live in the "throttle" cache, which every gunicorn worker shares,
+and are updated with add() and incr() so concurrent attempts all count.
+Keys found over the limit are also remembered in a per-process LRU of at
+most LOGIN_THROTTLE_LOCAL_SIZE entries, so a credential-stuffing burst is
+turned away without any cache I/O. Either way attempts are rejected before
+any password is hashed.
+"""
+
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.connection import ConnectionProxy
+from rest_framework.throttling import BaseThrottle
+
+from core import metrics
+
+THROTTLE_KEY = "throttle:{scope}:{ident}:{window}"
+cache = ConnectionProxy(caches, "throttle")
+PERIODS = {"s": 1, "m": 60, "h": 60 * 60, "d": 24 * 60 * 60}
+
+_blocked = OrderedDict()  # (scope, ident) -> time.time() the block ends
+_blocked_lock = threading.Lock()
+
+
+def parse_rate(rate):
+    """
+    Parses "<attempts>/<period>" (s, m, h or d, as in DRF) into
+    (attempts, seconds); None disables the limiter.
+    """
+    if not rate:
+        return None, None
+    attempts, period = rate.split("/")
+    return int(attempts), PERIODS[period[0]]
+
+
+def _remember_blocked(key, until):
+    with _blocked_lock:
+        _blocked[key] = until
+        _blocked.move_to_end(key)
+        while len(_blocked) > settings.LOGIN_THROTTLE_LOCAL_SIZE:
+            _blocked.popitem(last=False)
+
+
+def _blocked_for(key, now):
+    with _blocked_lock:
+        until = _blocked.get(key)
+        if until is None:
+            return None
+        if until <= now:
+            del _blocked[key]
+            return None
+        return until - now
+
+
+class SlidingWindowLimiter:
+    def __init__(self, scope, rate):
+        self.scope = scope
+        self.limit, self.window = parse_rate(rate)
+
+    def wait_time(self, previous, current, elapsed):
+        """
+        Seconds until the estimate drops below the limit again.
+        """
+        if current >= self.limit:
+            # Wait out this window, then until the carried-over share of
+            # `current` has decayed below the limit.
+            return (self.window - elapsed) + self.window * (1 - self.limit / current)
+        # Only the previous window's share has to decay.
+        return self.window * (1 - (self.limit - current) / previous) - elapsed
+
+    def attempt(self, ident):
+        """
+        Counts one attempt for ident. Returns None if it is allowed, else
+        the number of seconds to wait (the attempt is then not counted).
+        """
+        if self.limit is None or not ident:
+            return None
+
+        now = time.time()
+        if self.limit <= 0:
+            # "0/m" turns every attempt away; there is nothing to count
+            metrics.inc("smartcalc_login_throttled_total", {"scope": self.scope, "layer": "local"})
+            return self.window - now % self.window
+
+        key = (self.scope, ident)
+        wait = _blocked_for(key, now)
+        if wait is not None:
+            metrics.inc("smartcalc_login_throttled_total", {"scope": self.scope, "layer": "local"})
+            return wait
+
+        window, elapsed = divmod(now, self.window)
+        current_key = THROTTLE_KEY.format(scope=self.scope, ident=ident, window=int(window))
+        previous_key = THROTTLE_KEY.format(scope=self.scope, ident=ident, window=int(window) - 1)
+        previous = cache.get(previous_key, 0)
+
+        # add() then incr() give every attempt its own count, however many
+        # workers make one at once: both are atomic on memcached, Redis and
+        # core.filecache. The key is kept for two windows so that it can
+        # still be read as "previous", and incr() keeps that expiry.
+        cache.add(current_key, 0, 2 * self.window)
+        try:
+            current = cache.incr(current_key)
+        except ValueError:
+            # Expired or culled between the two calls
+            cache.add(current_key, 1, 2 * self.window)
+            current = 1
+
+        # Attempts counted before this one
+        earlier = current - 1
+        if previous * (1 - elapsed / self.window) + earlier >= self.limit:
+            try:
+                cache.decr(current_key)
+            except ValueError:
+                pass
+            wait = self.wait_time(previous, earlier, elapsed)
+            _remember_blocked(key, now + wait)
+            metrics.inc("smartcalc_login_throttled_total", {"scope": self.scope, "layer": "shared"})
+            return wait
+        return None
+
+
+def _identifier_key(identifier):
+    # Fixed-length cache keys however long the submitted identifier is
+    return hashlib.sha1(identifier.strip().lower().encode()).hexdigest()
+
+
+def check_login(request, identifier):
+    """
+    Counts a login attempt against the per-IP and per-identifier limits.
+    The IP is REMOTE_ADDR, or with REST_FRAMEWORK["NUM_PROXIES"] set, the
+    X-Forwarded-For entry added by the outermost trusted proxy.
+
+    Returns None if it may proceed, else the seconds to wait. Call it
+    before authenticate(), so throttled attempts never reach the hasher.
+    """
+    ip_limiter = SlidingWindowLimiter("ip", settings.LOGIN_THROTTLE_RATES["ip"])
+    wait = ip_limiter.attempt(BaseThrottle().get_ident(request))
+    if wait is None and isinstance(identifier, str):
+        identifier_limiter = SlidingWindowLimiter(
+            "identifier", settings.LOGIN_THROTTLE_RATES["identifier"]
+        )
+        wait = identifier_limiter.attempt(_identifier_key(identifier))
+    return max(1, math.ceil(wait)) if wait is not None else None
+
+
+class LoginRateThrottle(BaseThrottle):
+    """
+    check_login() as a DRF throttle; DRF runs throttles before the
+    serializer, so before any password hashing.
+    """
+
+    def allow_request(self, request, view):
+        data = request.data
+        identifier = data.get("username") if hasattr(data, "get") else None
+        self.wait_seconds = check_login(request, identifier)
+        return self.wait_seconds is None
+
+    def wait(self):
+        return self.wait_seconds
@@ -0,0 +1,214 @@
+"""
+Refresh token revocation backed by the RevokedToken table.
+
+Rotating a refresh token inserts its jti; the unique index makes that
+insert the authoritative "was this token already used?" check, so a
+refresh costs a single indexed INSERT. Revoked jtis are also remembered
+in the "revoked" cache, which turns replays of a rotated token away
+before any query. It is per process unless REVOKED_CACHE_BACKEND names a
+shared store; another worker then still finds the jti in the table.
+"""
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.connection import ConnectionProxy
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, TokenError
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from .authentication import USER_CLAIMS, user_claims
+from .models import RevokedToken
+
+REVOKED_KEY = "jwt:revoked:{jti}"
+revoked_cache = ConnectionProxy(caches, "revoked")
+
+
+def _remember(jti, expires_at):
+    timeout = int((expires_at - timezone.now()).total_seconds())
+    if timeout > 0:
+        revoked_cache.set(REVOKED_KEY.format(jti=jti), True, timeout)
+
+
+async def _aremember(jti, expires_at):
+    timeout = int((expires_at - timezone.now()).total_seconds())
+    if timeout > 0:
+        await revoked_cache.aset(REVOKED_KEY.format(jti=jti), True, timeout)
+
+
+def is_known_revoked(jti):
+    """
+    Answers from the "revoked" cache only; False means "not known here".
+    """
+    return revoked_cache.get(REVOKED_KEY.format(jti=jti), False)
+
+
+async def ais_known_revoked(jti):
+    return await revoked_cache.aget(REVOKED_KEY.format(jti=jti), False)
+
+
+def is_revoked(jti):
+    return is_known_revoked(jti) or RevokedToken.objects.filter(jti=jti).exists()
+
+
+async def ais_revoked(jti):
+    return (
+        await ais_known_revoked(jti)
+        or await RevokedToken.objects.filter(jti=jti).aexists()
+    )
+
+
+def _db_checked_by_blacklist():
+    # With rotation + blacklisting, blacklist() is the DB check.
+    return api_settings.ROTATE_REFRESH_TOKENS and api_settings.BLACKLIST_AFTER_ROTATION
+
+
+def revoke(jti, expires_at):
+    """
+    Records the jti as revoked. Returns False if it already was.
+    """
+    try:
+        with transaction.atomic():
+            RevokedToken.objects.create(jti=jti, expires_at=expires_at)
+    except IntegrityError:
+        _remember(jti, expires_at)
+        return False
+    _remember(jti, expires_at)
+    return True
+
+
+async def arevoke(jti, expires_at):
+    # Async views never run inside ATOMIC_REQUESTS, so no savepoint is needed.
+    try:
+        await RevokedToken.objects.acreate(jti=jti, expires_at=expires_at)
+    except IntegrityError:
+        await _aremember(jti, expires_at)
+        return False
+    await _aremember(jti, expires_at)
+    return True
+
+
+class RevocableRefreshToken(RefreshToken):
+    def access_token_for(self, user):
+        """
+        An access token carrying user's current claims.
+
+        The refresh token holds no claims of its own, only the user id, so
+        each refresh re-reads roles and flags from the row. Claims left in
+        tokens issued before that are dropped here, from both tokens.
+        """
+        for claim in USER_CLAIMS:
+            self.payload.pop(claim, None)
+        access = self.access_token
+        for claim, value in user_claims(user).items():
+            access[claim] = value
+        return access
+
+    def verify(self, *args, **kwargs):
+        super().verify(*args, **kwargs)
+
+        jti = self.payload[api_settings.JTI_CLAIM]
+        if _db_checked_by_blacklist():
+            revoked = is_known_revoked(jti)
+        else:
+            revoked = is_revoked(jti)
+        if revoked:
+            raise TokenError(_("Token is blacklisted"))
+
+    def blacklist(self):
+        """
+        Revokes this token; fails if it was already used or revoked, which
+        also stops two concurrent refreshes of the same token.
+        """
+        jti = self.payload[api_settings.JTI_CLAIM]
+        expires_at = datetime_from_epoch(self.payload["exp"])
+        if not revoke(jti, expires_at):
+            raise TokenError(_("Token is blacklisted"))
+
+
+class AsyncRevocableRefreshToken(RevocableRefreshToken):
+    """
+    RevocableRefreshToken for async views.
+
+    The constructor only checks the signature, expiry and token type;
+    callers must await averify() for the revocation check and ablacklist()
+    to rotate.
+    """
+
+    def verify(self, *args, **kwargs):
+        RefreshToken.verify(self, *args, **kwargs)
+
+    async def averify(self):
+        jti = self.payload[api_settings.JTI_CLAIM]
+        if _db_checked_by_blacklist():
+            revoked = await ais_known_revoked(jti)
+        else:
+            revoked = await ais_revoked(jti)
+        if revoked:
+            raise TokenError(_("Token is blacklisted"))
+
+    async def ablacklist(self):
+        jti = self.payload[api_settings.JTI_CLAIM]
+        expires_at = datetime_from_epoch(self.payload["exp"])
+        if not await arevoke(jti, expires_at):
+            raise TokenError(_("Token is blacklisted"))
+
+
+def _active_user(user):
+    if user is None or not api_settings.USER_AUTHENTICATION_RULE(user):
+        raise AuthenticationFailed(
+            TokenRefreshSerializer.default_error_messages["no_active_account"],
+            "no_active_account",
+        )
+    return user
+
+
+def _token_user(refresh):
+    return get_user_model().objects.select_related("userprofile").filter(
+        **{api_settings.USER_ID_FIELD: refresh.payload.get(api_settings.USER_ID_CLAIM)}
+    )
+
+
+def _reissue(refresh):
+    refresh.set_jti()
+    refresh.set_exp()
+    refresh.set_iat()
+    return str(refresh)
+
+
+def rotate(raw_token):
+    """
+    Returns the new access (and rotated refresh) token, with claims from
+    the user row as it is now. Raises TokenError for invalid, expired or
+    already rotated tokens and AuthenticationFailed when the user is gone
+    or inactive.
+    """
+    refresh = RevocableRefreshToken(raw_token)
+    user = _active_user(_token_user(refresh).first())
+
+    data = {"access": str(refresh.access_token_for(user))}
+    if api_settings.ROTATE_REFRESH_TOKENS:
+        if api_settings.BLACKLIST_AFTER_ROTATION:
+            refresh.blacklist()
+        data["refresh"] = _reissue(refresh)
+    return data
+
+
+async def arotate(raw_token):
+    """
+    The async equivalent of rotate().
+    """
+    refresh = AsyncRevocableRefreshToken(raw_token)
+    await refresh.averify()
+    user = _active_user(await _token_user(refresh).afirst())
+
+    data = {"access": str(refresh.access_token_for(user))}
+    if api_settings.ROTATE_REFRESH_TOKENS:
+        if api_settings.BLACKLIST_AFTER_ROTATION:
+            await refresh.ablacklist()
+        data["refresh"] = _reissue(refresh)
+    return data
@@ -1,9 +1,15 @@
+from django.conf import settings
 from django.urls import path
-from .views import CreateUserView, UserListView, MeView, ChangePasswordView
+from .views import (
+    CreateUserView, UserListView, MeView, ChangePasswordView,
+    UserImportView, UserExportView, me_async,
+)
 
 urlpatterns = [
     path('create/', CreateUserView.as_view(), name='create_user'),
     path('list/', UserListView.as_view(), name='list_users'),
-    path('me/', MeView.as_view(), name='me'),
+    path('import/', UserImportView.as_view(), name='import_users'),
+    path('export/', UserExportView.as_view(), name='export_users'),
+    path('me/', me_async if settings.ASGI_MODE else MeView.as_view(), name='me'),
     path("change-password/", ChangePasswordView.as_view(), name="change_password"),
 ]
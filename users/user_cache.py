@@ -0,0 +1,62 @@
+"""
+A small per-process LRU cache of User rows for token-authenticated requests.
+
+Entries live for JWT_USER_CACHE_TTL seconds and are dropped on User
+save/delete in this process (see users.signals); other workers see changes
+once the TTL runs out.
+"""
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth.models import User
+
+_users = OrderedDict()
+_lock = threading.Lock()
+
+
+def _lookup(user_id, now):
+    with _lock:
+        entry = _users.get(user_id)
+        if entry is not None and entry[1] > now:
+            _users.move_to_end(user_id)
+            return copy.copy(entry[0])
+    return None
+
+
+def _store(user, now):
+    with _lock:
+        _users[user.pk] = (user, now + settings.JWT_USER_CACHE_TTL)
+        _users.move_to_end(user.pk)
+        while len(_users) > settings.JWT_USER_CACHE_SIZE:
+            _users.popitem(last=False)
+    return copy.copy(user)
+
+
+def get_cached_user(user_id):
+    """
+    Returns a private copy of the user, loading it at most once per TTL.
+
+    Raises User.DoesNotExist if there is no such user.
+    """
+    now = time.monotonic()
+    user = _lookup(user_id, now)
+    if user is None:
+        user = _store(User.objects.get(pk=user_id), now)
+    return user
+
+
+async def aget_cached_user(user_id):
+    now = time.monotonic()
+    user = _lookup(user_id, now)
+    if user is None:
+        user = _store(await User.objects.aget(pk=user_id), now)
+    return user
+
+
+def forget_user(user_id):
+    with _lock:
+        _users.pop(user_id, None)
@@ -1,10 +1,28 @@
+import json
+from core import metrics
+from core.streaming import streaming_response
+from django.conf import settings
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
 from rest_framework import generics, permissions
 from django.contrib.auth.models import User
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError
 from rest_framework import status
+from rest_framework.exceptions import APIException, NotAuthenticated, Throttled
 from rest_framework.permissions import IsAuthenticated
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from adminpanel import audit
+from adminpanel.models import AuditEvent
 from .serializers import UserSerializer, CreateUserSerializer
+from .pagination import UserCursorPagination
+from .hashing import HashingBusy, check_password, set_password
+from .authentication import ClaimsJWTAuthentication
+from .throttling import LoginRateThrottle
+from .user_cache import forget_user
+from .tokens import arotate
+from .bulk import FORMATS, detect_format, export_users, import_users
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.views import TokenObtainPairView
@@ -29,16 +47,85 @@ class CreateUserView(generics.CreateAPIView):
 
 class UserListView(generics.ListAPIView):
     """
-    Admin-only list of all users.
+    Admin-only list of all users, paginated by cursor.
+
+    ``?export=stream`` returns every user as one streamed JSON array instead.
     """
-    queryset = User.objects.all()
+    queryset = User.objects.only(*UserSerializer.Meta.fields)
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated, IsAdmin]
+    pagination_class = UserCursorPagination
+    export_chunk_size = 2000
+
+    def list(self, request, *args, **kwargs):
+        if request.query_params.get("export") == "stream":
+            return streaming_response(
+                request._request, self.stream_users(), content_type="application/json"
+            )
+        return super().list(request, *args, **kwargs)
+
+    def stream_users(self):
+        # Rows are fetched in chunks and encoded one at a time, so memory
+        # stays flat however many users there are.
+        fields = UserSerializer.Meta.fields
+        rows = User.objects.order_by('id').values_list(*fields).iterator(
+            chunk_size=self.export_chunk_size
+        )
+        yield "["
+        for i, row in enumerate(rows):
+            yield ("," if i else "") + json.dumps(dict(zip(fields, row)))
+        yield "]"
+
+
+class UserImportView(APIView):
+    """
+    Admin-only bulk import of users from a CSV or JSONL request body.
+
+    Rows are validated, hashed in parallel and inserted in batches; the
+    response streams one JSON line per row with its result.
+    """
+    permission_classes = [permissions.IsAuthenticated, IsAdmin]
+
+    def post(self, request):
+        file_format = detect_format(request)
+        if file_format is None:
+            return Response(
+                {"detail": "Send text/csv or application/jsonl, or set ?file_format=csv|jsonl."},
+                status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+            )
+
+        # Read the body as a stream; touching request.data would buffer it.
+        results = import_users(request._request, file_format, settings.USER_IMPORT_BATCH_SIZE)
+        return streaming_response(request._request, results, content_type=FORMATS["jsonl"])
+
+
+class UserExportView(APIView):
+    """
+    Admin-only streaming export of all users as CSV or JSONL (?file_format=).
+    """
+    permission_classes = [permissions.IsAuthenticated, IsAdmin]
+    export_chunk_size = 2000
+
+    def get(self, request):
+        file_format = request.query_params.get("file_format", "csv")
+        if file_format not in FORMATS:
+            return Response(
+                {"detail": "file_format must be csv or jsonl."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        response = streaming_response(
+            request._request,
+            export_users(file_format, self.export_chunk_size),
+            content_type=FORMATS[file_format],
+        )
+        response["Content-Disposition"] = f'attachment; filename="users.{file_format}"'
+        return response
 
 
 class MeView(APIView):
     """
-    Returns info of the logged-in user.
+    Returns info of the logged-in user, straight from the token claims.
     """
     permission_classes = [permissions.IsAuthenticated]
 
@@ -46,11 +133,46 @@ class MeView(APIView):
         serializer = UserSerializer(request.user)
         return Response(serializer.data)
 
+
+# ASGI_MODE versions of the read-heavy endpoints. They are plain Django
+# async views, since DRF views are synchronous, and answer errors with the
+# same bodies and status codes as the DRF views above.
+
+def _error_response(exc):
+    detail = exc.detail if isinstance(exc.detail, dict) else {"detail": exc.detail}
+    response = JsonResponse(detail, status=exc.status_code)
+    if exc.status_code == status.HTTP_401_UNAUTHORIZED:
+        response["WWW-Authenticate"] = ClaimsJWTAuthentication().authenticate_header(None)
+    return response
+
+
+@require_GET
+async def me_async(request):
+    try:
+        authenticated = await ClaimsJWTAuthentication().aauthenticate(request)
+        if authenticated is None:
+            raise NotAuthenticated()
+    except APIException as exc:
+        return _error_response(exc)
+    return JsonResponse(UserSerializer(authenticated[0]).data)
+
 class CustomLoginView(TokenObtainPairView):
     serializer_class = CustomLoginSerializer
+    throttle_classes = [LoginRateThrottle]
 
     def post(self, request, *args, **kwargs):
-        response = super().post(request, *args, **kwargs)
+        try:
+            response = super().post(request, *args, **kwargs)
+        except HashingBusy:
+            metrics.inc("smartcalc_logins_total", {"result": "busy"})
+            raise
+        except Throttled:
+            metrics.inc("smartcalc_logins_total", {"result": "throttled"})
+            raise
+        except Exception:
+            metrics.inc("smartcalc_logins_total", {"result": "failure"})
+            raise
+        metrics.inc("smartcalc_logins_total", {"result": "success"})
 
         return Response({
             "token": response.data["access"],
@@ -65,7 +187,9 @@ class ChangePasswordView(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
-        user = request.user
+        # Never the cached row: the password must be checked against the
+        # current hash, and only the password column is written back
+        user = User.objects.select_related('userprofile').get(pk=request.user.pk)
 
         current_password = request.data.get("current_password")
         new_password = request.data.get("new_password")
@@ -77,7 +201,7 @@ class ChangePasswordView(APIView):
             )
 
         # Verify current password
-        if not user.check_password(current_password):
+        if not check_password(user, current_password):
             return Response(
                 {"detail": "Current password is incorrect."},
                 status=status.HTTP_400_BAD_REQUEST
@@ -93,15 +217,45 @@ class ChangePasswordView(APIView):
             )
 
         # Set new password
-        user.set_password(new_password)
-        user.save()
+        set_password(user, new_password)
+        user.save(update_fields=["password"])
+        forget_user(user.pk)
         profile = getattr(user, 'userprofile', None)
         if profile:
             profile.must_change_password = False
-            profile.save()
+            profile.save(update_fields=["must_change_password"])
 
+        audit.record(request, AuditEvent.PASSWORD_CHANGED, target=user.username)
 
         return Response(
             {"detail": "Password changed successfully."},
             status=status.HTTP_200_OK
-        )
\ No newline at end of file
+        )
+
+
+@csrf_exempt
+@require_POST
+async def token_refresh_async(request):
+    if request.content_type == "application/json":
+        try:
+            body = json.loads(request.body)
+        except ValueError:
+            return JsonResponse({"detail": "JSON parse error."}, status=status.HTTP_400_BAD_REQUEST)
+    else:
+        body = request.POST
+    raw_token = body.get("refresh") if hasattr(body, "get") else None
+    if not raw_token:
+        return JsonResponse(
+            {"refresh": ["This field is required."]}, status=status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        data = await arotate(raw_token)
+    except TokenError as e:
+        metrics.inc("smartcalc_token_refreshes_total", {"result": "failure"})
+        return _error_response(InvalidToken(e.args[0]))
+    except APIException as exc:
+        metrics.inc("smartcalc_token_refreshes_total", {"result": "failure"})
+        return _error_response(exc)
+    metrics.inc("smartcalc_token_refreshes_total", {"result": "success"})
+    return JsonResponse(data)